@@ -1,29 +1,50 @@
 import argparse
 import logging
-import pkgutil
+import os
 import sys
+import threading
+import traceback
+from argparse import Namespace
+from typing import Callable, List, Tuple
 
 from dotenv import dotenv_values
 
-from amazon_scraper import actions
-from amazon_scraper.amazon.scraper import AmazonScraper
+from amazon_scraper.actions import ACTIONS
 from amazon_scraper.deps import AppArgs, Runner
-from amazon_scraper.firefly.api import FireflyAPI
+from amazon_scraper.metrics import METRICS
+from amazon_scraper.profiles import Profile, load_profiles
+from amazon_scraper.state import ProcessingState
 
+MB = 1024 * 1024
+# How often the main thread wakes up to handle Ctrl+C while profiles are running
+JOIN_INTERVAL = 1
 
-def setup_env():
+
+def setup_env(with_amazon: bool = True):
     env = dotenv_values()
 
-    REQUIRED_ENV_VARS = {
-        "AMAZON_HOST", "AMAZON_USER", "AMAZON_PASSWORD",
-        "FIREFLY_HOST", "FIREFLY_TOKEN",
-    }
+    REQUIRED_ENV_VARS = {"FIREFLY_HOST", "FIREFLY_TOKEN"}
+    if with_amazon:
+        # Amazon accounts are configured in the profiles file otherwise
+        REQUIRED_ENV_VARS.update(["AMAZON_HOST", "AMAZON_USER", "AMAZON_PASSWORD"])
     env_diff = REQUIRED_ENV_VARS.difference(env)
     if len(env_diff) > 0:
         raise EnvironmentError(f'Failed because {list(env_diff)} are not set')
 
     return env
 
+class LazySubParsersAction(argparse._SubParsersAction):
+    """Imports the module of the chosen action and adds its arguments just before the command line of the action is parsed."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        subparser = self._name_parser_map.get(values[0])
+        if subparser is not None and subparser.get_default("func") is None:
+            module = ACTIONS[values[0]].load()
+            subparser.set_defaults(func=module.run)
+            if hasattr(module, "add_arguments"):
+                module.add_arguments(subparser)
+        super().__call__(parser, namespace, values, option_string)
+
 def setup_parser(is_cli: bool):
     parser = argparse.ArgumentParser(
         prog="python -m amazon_scraper",
@@ -35,11 +56,105 @@ def setup_parser(is_cli: bool):
         default=".cache/",
         help='Cache directory for fetched web pages and scraped order details. Defaults to ".cache/"',
     )
+    parser.add_argument(
+        "--cache-backend",
+        choices=["sqlite", "files"],
+        default="sqlite",
+        help='Storage of the cache directory: a single "sqlite" database or one file per entry. Defaults to "sqlite".',
+    )
+    parser.add_argument(
+        "--cache-ttl-days",
+        type=float,
+        help="Number of days after which cached orders are scraped again. Cached orders never expire by default.",
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=float,
+        help="Cache size limit in MB. Least recently used entries are removed to fit into it. Unlimited by default.",
+    )
+    parser.add_argument(
+        "--cache-max-failure-size",
+        type=float,
+        default=50,
+        help="Size limit in MB for web pages saved when scraping failed. Defaults to 50.",
+    )
+    parser.add_argument(
+        "--archive-html",
+        choices=["gzip", "zstd"],
+        help='Keep compressed order pages in the "archive" subdirectory of the cache directory, so the reparse command can parse them again. "zstd" requires the zstandard package.',
+    )
+    parser.add_argument(
+        "--amazon-sessions",
+        type=int,
+        default=1,
+        help="Number of logged-in browser sessions scraping Amazon orders in parallel. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--amazon-rate-limit",
+        type=float,
+        default=15,
+        help="Maximum number of Amazon page loads per minute across all sessions. Defaults to 15.",
+    )
+    parser.add_argument(
+        "--amazon-backend",
+        choices=["selenium", "http"],
+        default="selenium",
+        help='Page loading backend. "http" loads pages over plain HTTP with cookies of a logged-in browser session and uses Selenium only to log in and pass challenges. Defaults to "selenium".',
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Run in read-only mode, without changing any data in Firefly III database.",
     )
+    parser.add_argument(
+        "--firefly-pool-size",
+        type=int,
+        default=10,
+        help="Maximum number of keep-alive connections to Firefly III. Defaults to 10.",
+    )
+    parser.add_argument(
+        "--firefly-retries",
+        type=int,
+        default=3,
+        help="Number of retries with exponential backoff for failed idempotent Firefly III requests (429/5xx). Defaults to 3.",
+    )
+    parser.add_argument(
+        "--firefly-timeout",
+        type=float,
+        default=30,
+        help="Firefly III request timeout in seconds. Defaults to 30.",
+    )
+    parser.add_argument(
+        "--commit-workers",
+        type=int,
+        default=4,
+        help="Number of concurrent Firefly III transaction updates. 0 updates transactions inline. Defaults to 4.",
+    )
+    parser.add_argument(
+        "--commit-queue-size",
+        type=int,
+        help="Maximum number of transaction update batches waiting to be written. Defaults to twice the commit workers.",
+    )
+    parser.add_argument(
+        "--commit-batch-size",
+        type=int,
+        default=10,
+        help="Number of transaction updates queued before they are handed to a commit worker at once. Defaults to 10.",
+    )
+    parser.add_argument(
+        "--match-time-budget",
+        type=float,
+        default=1,
+        help="Seconds spent searching the best assignment of an order's transactions to its shipments. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--profiles",
+        help="INI file with one section per Amazon account, processed concurrently instead of the account in .env. See README for the format.",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write counters and phase timings of the run to this JSON file when it ends.",
+    )
     parser.add_argument(
         "--log",
         help="Filename for storing all logging messages. Logs to stdout by default.",
@@ -49,13 +164,9 @@ def setup_parser(is_cli: bool):
         help="Log level. By default Info level and above messages are enabled.",
     )
 
-    subparsers = parser.add_subparsers(title="command", dest="command", required=is_cli)
-    for importer, modname, _ in pkgutil.iter_modules(actions.__path__):
-        if modname == "common":
-            continue
-        module = importer.find_spec(modname).loader.load_module(modname)
-        subparser = subparsers.add_parser(modname, help=module.__doc__)
-        subparser.set_defaults(func=module.run)
+    subparsers = parser.add_subparsers(title="command", dest="command", required=is_cli, action=LazySubParsersAction)
+    for spec in ACTIONS.values():
+        subparsers.add_parser(spec.name, help=spec.help, description=spec.help)
 
     return parser
 
@@ -72,27 +183,137 @@ def setup_logger(args: AppArgs):
     else:
         logger.setLevel(logging.INFO)
 
-def setup(is_cli: bool = True, args = None):
-    env = setup_env()
-    parser = setup_parser(is_cli)
-    args = parser.parse_args(args)
-    app_args = AppArgs(args)
-    setup_logger(app_args)
-    amazon = AmazonScraper(
-        host=env["AMAZON_HOST"],
-        user=env["AMAZON_USER"],
-        password=env["AMAZON_PASSWORD"],
-        cache_dir=app_args.cache_dir,
+def setup_amazon(profile: Profile, app_args: AppArgs):
+    # Selenium, bs4 and lxml are imported only by actions using Amazon
+    from amazon_scraper.amazon.archive import HtmlArchive
+    from amazon_scraper.amazon.cache_policy import CachePolicy
+    from amazon_scraper.amazon.scraper import AmazonScraper
+
+    return AmazonScraper(
+        host=profile.host,
+        user=profile.user,
+        password=profile.password,
+        cache_dir=profile.cache_dir,
+        sessions=app_args.amazon_sessions,
+        requests_per_minute=app_args.amazon_rate_limit,
+        backend=app_args.amazon_backend,
+        cache_backend=app_args.cache_backend,
+        cache_policy=CachePolicy(
+            ttl=app_args.cache_ttl_days * 24 * 3600 if app_args.cache_ttl_days is not None else None,
+            max_size=int(app_args.cache_max_size * MB) if app_args.cache_max_size is not None else None,
+            max_failure_size=int(app_args.cache_max_failure_size * MB) if app_args.cache_max_failure_size is not None else None,
+        ),
+        archive=HtmlArchive(os.path.join(profile.cache_dir, "archive"), app_args.archive_html) if app_args.archive_html is not None else None,
+        dry_run=app_args.dry_run,
     )
-    firefly = FireflyAPI(
+
+def setup_firefly(env: dict, app_args: AppArgs):
+    from amazon_scraper.firefly.api import FireflyAPI
+
+    return FireflyAPI(
         host=env["FIREFLY_HOST"],
         auth_token=env["FIREFLY_TOKEN"],
+        pool_size=app_args.firefly_pool_size,
+        retries=app_args.firefly_retries,
+        timeout=app_args.firefly_timeout,
     )
-    return (args, Runner(amazon, firefly, app_args))
+
+def shared(factory: Callable):
+    """Returns a thread-safe factory creating the object once."""
+
+    lock = threading.Lock()
+    created = []
+
+    def get():
+        with lock:
+            if len(created) == 0:
+                created.append(factory())
+            return created[0]
+
+    return get
+
+def setup_runners(is_cli: bool = True, args = None) -> Tuple[Namespace, List[Runner]]:
+    """Returns a runner for every account profile, or a single runner for the account in .env."""
+
+    parser = setup_parser(is_cli)
+    args = parser.parse_args(args)
+    app_args = AppArgs(args)
+    env = setup_env(with_amazon=app_args.profiles is None)
+    setup_logger(app_args)
+
+    if app_args.profiles is None:
+        profiles = [Profile.from_env(env, app_args.cache_dir)]
+    else:
+        profiles = load_profiles(app_args.profiles, app_args.cache_dir)
+
+    # One pooled Firefly client serves all profiles
+    firefly_factory = shared(lambda: setup_firefly(env, app_args))
+    runners = [
+        Runner(
+            None,
+            None,
+            app_args,
+            ProcessingState(profile.cache_dir),
+            amazon_factory=lambda profile=profile: setup_amazon(profile, app_args),
+            firefly_factory=firefly_factory,
+            profile=profile,
+        )
+        for profile in profiles
+    ]
+    return (args, runners)
+
+def setup(is_cli: bool = True, args = None):
+    """Returns a runner for the account in .env or the first account profile."""
+    (args, runners) = setup_runners(is_cli, args)
+    return (args, runners[0])
+
+def run_profiles(func: Callable[[Runner], None], runners: List[Runner]) -> bool:
+    """Runs the action for all profiles concurrently, returns whether all of them succeeded."""
+
+    failed = []
+
+    def run(runner: Runner):
+        try:
+            func(runner)
+        except Exception:
+            logging.error(f"Profile {runner.profile.name} failed with error:\n{traceback.format_exc()}")
+            failed.append(runner.profile.name)
+
+    # Threads rather than processes, so the profiles share Firefly keep-alive connections
+    threads = [threading.Thread(target=run, args=(x,), name=x.profile.name, daemon=True) for x in runners]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(JOIN_INTERVAL)
+    except KeyboardInterrupt:
+        logging.info("Stopping all profiles")
+        for runner in runners:
+            if "amazon" in runner.__dict__: # Only close browsers which were started
+                runner.amazon.clean_up()
+        return False
+
+    if len(failed) > 0:
+        logging.error(f"Failed profiles: {', '.join(failed)}")
+    return len(failed) == 0
 
 def main():
-    (args, runner) = setup()
-    args.func(runner)
+    (args, runners) = setup_runners()
+    try:
+        if len(runners) == 1:
+            args.func(runners[0])
+            return
+
+        # Log lines of concurrent profiles are told apart by thread names
+        for handler in logging.getLogger().handlers:
+            handler.setFormatter(logging.Formatter("[%(threadName)s] %(message)s"))
+        if not run_profiles(args.func, runners):
+            sys.exit(1)
+    finally:
+        if args.metrics_file is not None:
+            METRICS.write_summary(args.metrics_file)
+            logging.info(f"Metrics written to {args.metrics_file}")
 
 if __name__ == "__main__":
     main()
@@ -1,2 +1,29 @@
-from . import fetch
-from . import reformat
+"""
+Registry of command line actions.
+
+Actions are declared by name and module, so listing them imports nothing. An action module is imported
+only when its command is run, together with Selenium, bs4 or requests if it needs them.
+Each module defines `run(runner)` and optionally `add_arguments(parser)`.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Dict
+
+
+class ActionSpec:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.module = f"{__name__}.{name}"
+        self.help = help # Same as the module docstring, which can't be read without importing the module
+
+    def load(self) -> ModuleType:
+        return importlib.import_module(self.module)
+
+ACTIONS: Dict[str, ActionSpec] = {x.name: x for x in [
+    ActionSpec("backfill", "Fills the order cache in bulk from Amazon order history pages for a date range."),
+    ActionSpec("cache", "Prints cache statistics and removes expired or over the limit cache entries."),
+    ActionSpec("fetch", "Fetches Amazon order info for new transaction groups which don't have notes attached."),
+    ActionSpec("reparse", "Rebuilds cached orders from archived order pages without loading anything from Amazon."),
+    ActionSpec("watch", "Keeps running and fetches new transactions periodically or when notified by a Firefly III webhook."),
+]}
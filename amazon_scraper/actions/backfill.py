@@ -0,0 +1,47 @@
+"""Fills the order cache in bulk from Amazon order history pages for a date range."""
+
+import logging
+from argparse import ArgumentParser
+from datetime import date, timedelta
+
+from amazon_scraper.actions.common import *
+from amazon_scraper.deps import Runner
+
+
+def add_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        default=date.today() - timedelta(days=365),
+        help="First order date in YYYY-MM-DD format. Defaults to a year ago.",
+    )
+    parser.add_argument(
+        "--until",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="Last order date in YYYY-MM-DD format. Defaults to today.",
+    )
+
+def run(runner: Runner):
+    amazon = runner.amazon
+    (since, until) = (runner.args.namespace.since, runner.args.namespace.until)
+
+    with log_duration("Reading order history"):
+        cards = list(amazon.scrape_order_history(since, until))
+    cached = amazon.cache.get_many([f"{x.order_id}.json" for x in cards])
+    cards = [x for x in cards if f"{x.order_id}.json" not in cached]
+
+    complete = [x for x in cards if x.order is not None]
+    incomplete = [x.order_id for x in cards if x.order is None]
+    logging.info(f"Found {len(cached) + len(cards)} orders placed from {since} to {until}: {len(cached)} are cached, {len(complete)} are complete in order history, {len(incomplete)} need order details")
+
+    if runner.args.dry_run:
+        return
+
+    for card in complete:
+        amazon.cache.add(f"{card.order_id}.json", card.order.to_json())
+
+    with log_duration("Scraping order details"):
+        (_, errors) = amazon.scrape_orders(incomplete)
+    for order_id, error in errors.items():
+        logging.info(f"[{order_id}] Order scraping failed with error:\n{error}")
@@ -0,0 +1,32 @@
+"""Prints cache statistics and removes expired or over the limit cache entries."""
+
+import logging
+from argparse import ArgumentParser
+
+from amazon_scraper.amazon.cache import SqliteCache
+from amazon_scraper.amazon.cache_policy import format_size
+from amazon_scraper.deps import Runner
+
+
+def add_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove entries according to --cache-ttl-days, --cache-max-size and --cache-max-failure-size limits.",
+    )
+
+def run(runner: Runner):
+    amazon = runner.amazon
+    logging.info(f"Cache statistics:\n{amazon.cache_policy.stats(amazon.cache)}")
+
+    if not runner.args.namespace.prune:
+        return
+
+    if runner.args.dry_run:
+        logging.info("Dry run, nothing was removed.")
+        return
+
+    removed = amazon.prune_cache()
+    if isinstance(amazon.cache, SqliteCache):
+        amazon.cache.vacuum()
+    logging.info(f"Removed {len(removed)} entries ({format_size(sum(x.size for x in removed))}). Cache statistics:\n{amazon.cache_policy.stats(amazon.cache)}")
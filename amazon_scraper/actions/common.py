@@ -1,9 +1,18 @@
+import logging
+import time
+from contextlib import contextmanager
 from typing import List
 
 from amazon_scraper.amazon.models import *
 from amazon_scraper.firefly.models import *
 
 
+@contextmanager
+def log_duration(phase: str):
+    start = time.monotonic()
+    yield
+    logging.info(f"{phase} took {time.monotonic() - start:.1f}s")
+
 def pad_strings(string: str, first: str = "  ", each: str = "  "):
     return first + f"\n{each}".join(string.split(sep="\n"))
 
@@ -18,7 +27,7 @@ def format_tx_urls(groups: List[TransactionGroup], host: str):
 
 def match_tx(tx: Transaction, item: AmazonShipmentItem, order_url: str, set_amount: bool):
     if set_amount:
-        tx.amount = f'{float(item.amount) * float(item.quantity):.2f}'
+        tx.amount = item.amount * item.quantity
 
     tx.external_url = order_url
     tx.internal_reference = f"{item.price_note} @ {item.url}"
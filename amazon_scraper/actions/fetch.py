@@ -2,79 +2,284 @@
 
 import logging
 import traceback
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
 from itertools import groupby
-from typing import List
+from typing import List, Tuple, Union
 
 from amazon_scraper.actions.common import *
 from amazon_scraper.deps import Runner
 from amazon_scraper.firefly.models import *
 from amazon_scraper.amazon.scraper import AmazonScraperSetupException
-
+from amazon_scraper.matching import AssignmentSolver, OrderIndex, closest_shipments
+from amazon_scraper.metrics import METRICS
+from amazon_scraper.state import ProcessingState
+
+# Inclusive date range of transactions, open ends search without a limit
+Window = Tuple[Union[date, None], Union[date, None]]
+
+
+def add_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "--orphan-max-days",
+        type=int,
+        default=3,
+        help="Transactions without an order ID are linked to a cached order with a payment of the same amount within this many days. Defaults to 3.",
+    )
+    parser.add_argument(
+        "--retry-failed",
+        action="store_true",
+        help="Process orders which failed in earlier runs right away instead of waiting for their next retry time.",
+    )
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="Only process transactions on or after this date, in YYYY-MM-DD format. The whole history by default.",
+    )
+    parser.add_argument(
+        "--until",
+        type=date.fromisoformat,
+        help="Only process transactions on or before this date, in YYYY-MM-DD format.",
+    )
+    parser.add_argument(
+        "--window-days",
+        type=int,
+        help="Split the range starting at --since into windows of this many days, each searched and committed separately.",
+    )
+    parser.add_argument(
+        "--parallel-windows",
+        type=int,
+        default=1,
+        help="Number of date windows processed in parallel. Defaults to 1.",
+    )
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        help='Process only every N-th window starting from the K-th one, given as "K/N", to split a range across several runs.',
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip date windows completed by earlier runs with the same range, e.g. to continue an interrupted backfill.",
+    )
 
 def run(runner: Runner):
-    last_groups = []
-
-    while True:
-        keyfunc = lambda x: x.amazon_info.order_id
-        groups = runner.firefly.search_transactions(f"{runner.base_query} no_notes:true")
-        groups = sorted(groups, key=keyfunc)
-
-        if len(groups) == 0 or groups == last_groups:
-            logging.info("No new transaction groups were found.")
-            return
-
-        last_groups = groups
-        logging.debug(f"Pending transaction groups:\n{format_list(groups)}")
-        assert all([len(x.transactions) == 1 for x in groups]), f"Unexpected number of transactions (!= 1)"
-
-        for order_id, iterable in groupby(groups, key=keyfunc):
-            order_groups = list(iterable)
-
-            if process_order(order_id, order_groups, runner):
+    if not runner.args.dry_run:
+        runner.amazon.prune_cache()
+
+    args = runner.args.namespace
+    windows = date_windows(args.since, args.until, args.window_days)
+    if args.shard is not None:
+        (index, count) = args.shard
+        windows = windows[index - 1::count]
+
+    state = runner.state if not runner.args.dry_run else None
+    if state is not None and args.resume:
+        # Open windows may have been checkpointed by older versions
+        completed = [x for x in windows if is_closed(x) and state.is_window_completed(window_query(runner, x))]
+        if len(completed) > 0:
+            logging.info(f"Skipping {len(completed)} date windows completed by earlier runs.")
+        windows = [x for x in windows if x not in completed]
+
+    if args.parallel_windows <= 1 or len(windows) <= 1:
+        for window in windows:
+            run_window(runner, window)
+        return
+
+    # Every window gets its own commit pipeline to know which of its updates failed
+    def run_parallel(window: Window):
+        window_runner = runner.fork()
+        try:
+            run_window(window_runner, window)
+        finally:
+            window_runner.commits.close()
+
+    with ThreadPoolExecutor(max_workers=args.parallel_windows, thread_name_prefix="window") as executor:
+        for future in [executor.submit(run_parallel, x) for x in windows]:
+            future.result()
+
+def run_window(runner: Runner, window: Window):
+    query = window_query(runner, window)
+    if window != (None, None):
+        logging.info(f"Processing transactions from {window[0] or 'the beginning'} to {window[1] or 'today'}")
+
+    keyfunc = lambda x: x.amazon_info.order_id
+    # Dry run doesn't change notes, so a single page is enough to preview the changes
+    max_pages = 1 if runner.args.dry_run else None
+    # Collect all pages before committing anything: updated groups get notes and drop out of
+    # the `no_notes:true` results, which would otherwise shift the following pages.
+    with log_duration("Searching transactions"), METRICS.timer("search"):
+        groups = list(runner.firefly.search_transactions(query, max_pages=max_pages))
+
+    orphans = [x for x in groups if x.amazon_info is None]
+    groups = [x for x in groups if x.amazon_info is not None]
+    if len(orphans) > 0:
+        with log_duration("Linking transactions without order ID"):
+            groups.extend(link_orphans(orphans, runner, runner.args.namespace.orphan_max_days))
+    groups = sorted(groups, key=keyfunc)
+
+    state = runner.state if not runner.args.dry_run else None
+    # Only a search of the whole history tells which failed groups are not pending anymore
+    if state is not None and window == (None, None):
+        state.forget_except([x.id for x in groups + orphans])
+
+    if len(groups) == 0:
+        logging.info("No new transaction groups were found.")
+        if state is not None and is_closed(window):
+            state.complete_window(query)
+        return
+
+    logging.debug(f"Pending transaction groups:\n{format_list(groups)}")
+    assert all([len(x.transactions) == 1 for x in groups]), f"Unexpected number of transactions (!= 1)"
+
+    orders = [(order_id, list(iterable)) for order_id, iterable in groupby(groups, key=keyfunc)]
+
+    waiting = []
+    if state is not None and not runner.args.namespace.retry_failed:
+        waiting = [order_id for order_id, order_groups in orders if state.is_waiting([x.id for x in order_groups])]
+        if len(waiting) > 0:
+            logging.info(f"Skipping {len(waiting)} orders which failed before and are not due for a retry yet.")
+        orders = [(order_id, order_groups) for order_id, order_groups in orders if order_id not in waiting]
+    # Windows with orders left to retry are searched again, so --resume doesn't lose them
+    complete = len(waiting) == 0
+
+    with log_duration("Prefetching orders"):
+        (scraped, scrape_errors) = runner.amazon.scrape_orders([order_id for order_id, _ in orders])
+    for order_id, error in scrape_errors.items():
+        logging.info(f"[{order_id}] Order scraping failed with error:\n{error}")
+
+    # All I/O with Amazon is done, so matching works only with memory
+    with log_duration("Matching orders"):
+        for order_id, order_groups in orders:
+            group_ids = [x.id for x in order_groups]
+            if order_id in scraped and match_order(order_id, scraped[order_id], order_groups, runner):
                 logging.info(f"[{order_id}] Updated groups:\n{format_tx_urls(order_groups, runner.firefly.host)}")
-
-        if runner.args.dry_run:
-            return
+                if state is not None:
+                    state.forget(group_ids)
+            else:
+                complete = False
+                outcome = ProcessingState.SCRAPE_ERROR if order_id not in scraped else ProcessingState.INCOMPLETE
+                METRICS.increment("order_failures", outcome=outcome)
+                if state is not None:
+                    state.record_failure(group_ids, order_id, outcome)
+
+    with log_duration("Waiting for transaction updates"):
+        errors = runner.commits.flush()
+    if len(errors) > 0:
+        logging.error(f"{len(errors)} transaction groups failed to update:\n{format_tx_urls([x.group for x in errors], runner.firefly.host)}")
+    elif state is not None and complete and is_closed(window):
+        state.complete_window(query)
+
+def window_query(runner: Runner, window: Window):
+    (since, until) = window
+    return " ".join([
+        runner.base_query,
+        "no_notes:true",
+        *([f"date_after:{since.isoformat()}"] if since is not None else []),
+        *([f"date_before:{until.isoformat()}"] if until is not None else []),
+    ])
+
+def is_closed(window: Window) -> bool:
+    """Returns whether no new transactions can appear in the window, so its search can be checkpointed."""
+
+    return window[1] is not None and window[1] < date.today()
+
+def date_windows(since: Union[date, None], until: Union[date, None], days: Union[int, None]) -> List[Window]:
+    """Splits the date range into consecutive windows of `days` days, the last window ends at `until` or today."""
+
+    if days is None or since is None:
+        return [(since, until)]
+
+    end = until if until is not None else date.today()
+    windows = []
+    start = since
+    while start <= end:
+        windows.append((start, min(start + timedelta(days=days - 1), end)))
+        start += timedelta(days=days)
+    # Keep the range open when it was, so transactions dated in the future are found too
+    if until is None and len(windows) > 0:
+        windows[-1] = (windows[-1][0], None)
+    return windows
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    (index, count) = [int(x) for x in value.split("/")]
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {value}")
+    return (index, count)
+
+def link_orphans(orphans: List[TransactionGroup], runner: Runner, max_days: int):
+    """Returns groups which were linked to a single cached order by amount and date."""
+
+    index = OrderIndex(runner.amazon.cached_orders(), max_days)
+    linked = []
+    for group in orphans:
+        day = group.transactions[0].date
+        candidates = index.candidates(group.amount, day) if day is not None else []
+        if len(candidates) == 1:
+            logging.info(f"[{candidates[0]}] Linked by amount and date:\n{format_item(group)}")
+            group.amazon_info = AmazonInfo(candidates[0], None)
+            linked.append(group)
+        elif len(candidates) > 1:
+            logging.info(f"Transaction without order ID matches several orders {candidates}:\n{format_item(group)}")
+        else:
+            logging.debug(f"Transaction without order ID matches no cached order:\n{format_item(group)}")
+    return linked
 
 def process_order(order_id: str, groups: List[TransactionGroup], runner: Runner):
-    logging.info(f"[{order_id}] Processing order with {len(groups)} transactions:\n{format_list(groups)}")
-
     try:
         order = runner.amazon.scrape_order(order_id)
-        logging.info(f"[{order_id}] Amazon order summary:\n" + pad_strings(order.summary))
     except (KeyboardInterrupt, AmazonScraperSetupException):
         raise
     except:
         logging.info(f"[{order_id}] Order scraping failed with error:\n{traceback.format_exc()}")
         return False
 
-    if len(groups) != len(order.shipments):
-        logging.warning(f"[{order_id}] Groups count ({len(groups)}) != Shipments count ({len(order.shipments)}). Probably a pagination issue.")
-        return False
+    return match_order(order_id, order, groups, runner)
 
-    unassigned_groups: List[TransactionGroup] = []
-    unassigned_shipments = list(order.shipments)
+def match_order(order_id: str, order: AmazonOrder, groups: List[TransactionGroup], runner: Runner):
+    with METRICS.timer("match"):
+        matched = match_groups(order_id, order, groups, runner)
+    if matched:
+        for group in groups:
+            for tag in Tags.all():
+                if tag in group.transactions[0].tags:
+                    METRICS.increment("match_outcomes", tag=tag)
+    return matched
 
-    for group in groups:
-        matched = False
+def match_groups(order_id: str, order: AmazonOrder, groups: List[TransactionGroup], runner: Runner):
+    logging.info(f"[{order_id}] Processing order with {len(groups)} transactions:\n{format_list(groups)}")
+    logging.info(f"[{order_id}] Amazon order summary:\n" + pad_strings(order.summary))
 
-        for index, shipment in enumerate(unassigned_shipments):
-            match_exactly = group.amount == shipment.amount
-            match_with_promo = group.amount == f"{float(shipment.amount) - order.promotion:.2f}"
+    if len(groups) > len(order.shipments):
+        logging.warning(f"[{order_id}] Groups count ({len(groups)}) > Shipments count ({len(order.shipments)}). Some order transactions are not in Firefly yet.")
+        return False
 
-            if match_exactly or match_with_promo:
-                logging.info(f'[{order_id}] Matched {"with promotion " if not match_exactly else ""}\n{format_item(group)}\n{format_item(shipment)}')
-                group.set_tags([Tags.MATCH])
-                match_tx_group(group, shipment, order.url)
-                commit_tx_group(group, runner)
+    solution = AssignmentSolver(order.shipments, order.promotion, runner.args.match_time_budget).solve(groups)
+    if solution.timed_out:
+        logging.warning(f"[{order_id}] Matching ran out of time, using the best assignment found so far.")
 
-                matched = True
-                unassigned_shipments.pop(index)
-                break
+    # Charges covering several shipments are the only way fewer groups account for the whole order,
+    # otherwise the remaining transactions aren't in Firefly yet and matched groups would drop out of
+    # the search, leaving the late ones to be solved against shipments which are already taken
+    if len(groups) < len(order.shipments) and (len(solution.unassigned_groups) > 0 or len(solution.unassigned_shipments) > 0):
+        logging.warning(f"[{order_id}] Groups count ({len(groups)}) < Shipments count ({len(order.shipments)}). Some order transactions are not in Firefly yet.")
+        return False
+
+    for assignment in solution.assignments:
+        group = assignment.group
+        shipment = assignment.shipment
+        details = "".join([
+            "with promotion " if assignment.with_promotion else "",
+            f"across {len(assignment.shipments)} shipments " if len(assignment.shipments) > 1 else "",
+        ])
+        logging.info(f'[{order_id}] Matched {details}\n{format_item(group)}\n{format_item(shipment)}')
+        group.set_tags([Tags.MATCH])
+        match_tx_group(group, shipment, order.url)
+        commit_tx_group(group, runner)
 
-        if not matched:
-            logging.debug(f"[{order_id}] Found no direct matches:\n{format_item(group)}")
-            unassigned_groups.append(group)
+    unassigned_groups = solution.unassigned_groups
+    unassigned_shipments = solution.unassigned_shipments
 
     if len(unassigned_groups) == 1 and len(unassigned_shipments) == 1:
         group = unassigned_groups[0]
@@ -88,14 +293,20 @@ def process_order(order_id: str, groups: List[TransactionGroup], runner: Runner)
         return True
 
     if len(unassigned_groups) > 0:
-        remaining_shipment_notes = "\n\n".join([
-            f'[All transaction for this order]({runner.firefly.host}/search?search={unassigned_groups[0].amazon_info.original_id})',
-            "One of the remaining shipments correspond to this transaction:",
-            *[pad_strings(str(item)) for item in unassigned_shipments],
-        ])
-        logging.info(f"[{order_id}] Filling for manual resolution:\n{format_list(unassigned_groups)}\nwith notes:\n{remaining_shipment_notes}")
+        # Shipments may all be taken by charges covering several of them
+        shipments = unassigned_shipments if len(unassigned_shipments) > 0 else order.shipments
+        closest = closest_shipments(unassigned_groups, shipments)
 
         for group in unassigned_groups:
+            # The most likely shipment goes first
+            candidates = sorted(shipments, key=lambda x: x is not closest.get(group.id))
+            remaining_shipment_notes = "\n\n".join([
+                f'[All transaction for this order]({runner.firefly.host}/search?search={group.amazon_info.original_id})',
+                "One of the remaining shipments correspond to this transaction:",
+                *[pad_strings(str(item)) for item in candidates],
+            ])
+            logging.info(f"[{order_id}] Filling for manual resolution:\n{format_item(group)}\nwith notes:\n{remaining_shipment_notes}")
+
             group.set_tags([Tags.MANUAL, Tags.TODO])
 
             tx = group.transactions[0]
@@ -126,8 +337,14 @@ def match_tx_group(group: TransactionGroup, shipment: AmazonShipment, order_url:
             match_tx(group.transactions[index], shipment.items[index], order_url, set_amount)
 
 def commit_tx_group(group: TransactionGroup, runner: Runner):
+    # Every update makes Firefly run its rules again
+    if not group.is_changed():
+        logging.info(f"[{group.amazon_info.order_id}] Group {group.id} is unchanged, skipping the update")
+        METRICS.increment("commits_skipped")
+        return
+
     if runner.args.dry_run:
         logging.info(f"[{group.amazon_info.order_id}] Resulting transaction group:\n{format_item(group)}")
         logging.info(f"~ PUT: {str(group.to_json())}")
     else:
-        runner.firefly.update_transaction(group)
+        runner.commits.submit(group)
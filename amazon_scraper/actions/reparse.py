@@ -0,0 +1,42 @@
+"""Rebuilds cached orders from archived order pages without loading anything from Amazon."""
+
+import logging
+import os
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+
+from amazon_scraper.actions.common import *
+from amazon_scraper.amazon.archive import HtmlArchive, reparse_page
+from amazon_scraper.deps import Runner
+
+
+def add_arguments(parser: ArgumentParser):
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of parsing processes. Defaults to the number of CPU cores.",
+    )
+
+def run(runner: Runner):
+    amazon = runner.amazon
+    archive = amazon.archive if amazon.archive is not None else HtmlArchive(os.path.join(runner.args.cache_dir, "archive"))
+    jobs = [(order_id, path, amazon.order_url(order_id), amazon.host) for order_id, path in archive.paths()]
+    if len(jobs) == 0:
+        logging.info("No archived order pages were found. Use --archive-html option to archive pages while scraping.")
+        return
+
+    updated = 0
+    failed = []
+    with log_duration(f"Parsing {len(jobs)} archived orders"):
+        with ProcessPoolExecutor(max_workers=runner.args.namespace.workers) as executor:
+            for order_id, order_json, error in executor.map(reparse_page, jobs, chunksize=16):
+                if error is not None:
+                    logging.debug(f"[{order_id}] Parsing archived page failed with error:\n{error}")
+                    failed.append(order_id)
+                elif not runner.args.dry_run:
+                    amazon.cache.add(f"{order_id}.json", order_json)
+                    amazon.cache.remove(f"{order_id}.html")
+                    updated += 1
+
+    logging.info(f"Updated {updated} cached orders, {len(failed)} orders failed to parse: {', '.join(failed)}")
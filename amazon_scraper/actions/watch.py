@@ -0,0 +1,111 @@
+"""Keeps running and fetches new transactions periodically or when notified by a Firefly III webhook."""
+
+import logging
+import threading
+import time
+import traceback
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from amazon_scraper.actions import fetch
+from amazon_scraper.actions.common import *
+from amazon_scraper.deps import Runner
+from amazon_scraper.metrics import METRICS, start_metrics_server
+
+# How often idle browsers are checked while waiting for the next run
+IDLE_CHECK_INTERVAL = 60
+
+
+def add_arguments(parser: ArgumentParser):
+    fetch.add_arguments(parser)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=300,
+        help="Seconds between Firefly III searches. Defaults to 300.",
+    )
+    parser.add_argument(
+        "--webhook-port",
+        type=int,
+        help="Listen for Firefly III webhook calls on this port and search right away when one arrives. With --profiles every profile listens on the next port. Disabled by default.",
+    )
+    parser.add_argument(
+        "--webhook-host",
+        default="127.0.0.1",
+        help='Address of the webhook and metrics listeners. Defaults to "127.0.0.1".',
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Expose run metrics to Prometheus on this port at /metrics. Disabled by default.",
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=600,
+        help="Seconds after which an unused browser is closed to free memory. It is started again when needed. Defaults to 600.",
+    )
+
+def run(runner: Runner):
+    args = runner.args.namespace
+    trigger = threading.Event()
+    stop = threading.Event()
+    server = None
+    if args.webhook_port is not None:
+        port = args.webhook_port + (runner.profile.index if runner.profile is not None else 0)
+        server = start_webhook_listener(args.webhook_host, port, trigger)
+    # Metrics of all profiles are collected together, so the first profile serves them
+    metrics_server = None
+    if args.metrics_port is not None and (runner.profile is None or runner.profile.index == 0):
+        metrics_server = start_metrics_server(args.webhook_host, args.metrics_port, METRICS)
+
+    try:
+        watch(runner, args.interval, args.idle_timeout, trigger, stop)
+    except KeyboardInterrupt:
+        logging.info("Stopped watching")
+    finally:
+        for listener in [server, metrics_server]:
+            if listener is not None:
+                listener.shutdown()
+                listener.server_close()
+        runner.amazon.clean_up()
+        runner.commits.close()
+
+def watch(runner: Runner, interval: float, idle_timeout: float, trigger: threading.Event, stop: threading.Event):
+    """Runs fetch until `stop` is set, then waits for `interval` seconds or until `trigger` is set."""
+
+    while not stop.is_set():
+        trigger.clear()
+        try:
+            with log_duration("Fetch run"):
+                fetch.run(runner)
+        except Exception:
+            # Keep watching, e.g. Amazon or Firefly might be temporarily unavailable
+            logging.error(f"Fetch run failed with error:\n{traceback.format_exc()}")
+
+        deadline = time.monotonic() + interval
+        while not stop.is_set():
+            timeout = deadline - time.monotonic()
+            if timeout <= 0 or trigger.wait(min(timeout, IDLE_CHECK_INTERVAL, idle_timeout)):
+                break
+            runner.amazon.recycle_idle_drivers(idle_timeout)
+
+def start_webhook_listener(host: str, port: int, trigger: threading.Event) -> ThreadingHTTPServer:
+    """Starts a background HTTP server which sets `trigger` on every POST request."""
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            # Firefly III sends the created transaction, but the search finds it anyway
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self.send_response(204)
+            self.end_headers()
+            logging.debug("Webhook received, fetching new transactions")
+            trigger.set()
+
+        def log_message(self, format: str, *args):
+            logging.debug(f"Webhook listener: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), WebhookHandler)
+    threading.Thread(target=server.serve_forever, name="webhook", daemon=True).start()
+    logging.info(f"Listening for webhooks on http://{host}:{server.server_port}/")
+    return server
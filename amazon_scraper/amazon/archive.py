@@ -0,0 +1,85 @@
+import gzip
+import os
+import tempfile
+import traceback
+from typing import List, Tuple, Union
+
+from amazon_scraper.amazon.models import AmazonOrder
+
+EXTENSIONS = {"gzip": ".html.gz", "zstd": ".html.zst"}
+
+
+class HtmlArchive:
+    """
+    Compressed order pages as they were fetched from Amazon, so orders can be parsed again without scraping.
+
+    Pages are stored as `<order_id>.html.gz` or, with the optional `zstandard` package, as `<order_id>.html.zst`.
+    """
+
+    def __init__(self, archive_dir: str, compression: str = "gzip"):
+        assert compression in EXTENSIONS, f"Unsupported compression {compression}"
+        if compression == "zstd":
+            import zstandard # Fail early when the optional dependency is missing
+
+        self.archive_dir = archive_dir if archive_dir.endswith("/") else archive_dir + "/"
+        self.compression = compression
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+    def add(self, order_id: str, html: str):
+        data = compress(html.encode(), self.compression)
+        (fd, path) = tempfile.mkstemp(dir=self.archive_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(path, self.archive_dir + order_id + EXTENSIONS[self.compression])
+        except:
+            os.remove(path)
+            raise
+
+        # Keep a single copy of the page
+        for compression, extension in EXTENSIONS.items():
+            if compression != self.compression and os.path.exists(self.archive_dir + order_id + extension):
+                os.remove(self.archive_dir + order_id + extension)
+
+    def get(self, order_id: str) -> Union[str, None]:
+        for extension in EXTENSIONS.values():
+            if os.path.exists(self.archive_dir + order_id + extension):
+                return read_page(self.archive_dir + order_id + extension)
+        return None
+
+    def paths(self) -> List[Tuple[str, str]]:
+        """Returns order IDs with paths of their archived pages."""
+
+        result = []
+        for entry in os.scandir(self.archive_dir):
+            for extension in EXTENSIONS.values():
+                if entry.is_file() and entry.name.endswith(extension):
+                    result.append((entry.name[:-len(extension)], entry.path))
+        return sorted(result)
+
+def compress(data: bytes, compression: str) -> bytes:
+    if compression == "zstd":
+        import zstandard
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data)
+
+def read_page(path: str) -> str:
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.endswith(EXTENSIONS["zstd"]):
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data).decode()
+    return gzip.decompress(data).decode()
+
+def reparse_page(job: Tuple[str, str, str, str]) -> Tuple[str, Union[str, None], Union[str, None]]:
+    """
+    Parses an archived page in a worker process.
+
+    Takes order ID, page path, order URL and host and returns order ID with either order JSON or an error.
+    """
+
+    (order_id, path, url, host) = job
+    try:
+        return (order_id, AmazonOrder.from_html(read_page(path), url, host).to_json(), None)
+    except Exception:
+        return (order_id, None, traceback.format_exc())
@@ -1,21 +1,210 @@
+import logging
 import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Dict, Iterable, List, Union
 
+# SQLite databases kept next to cache files, e.g. the processing state, including their -wal and -shm files
+DATABASE_SUFFIX = ".sqlite3"
+
+
+class CacheEntry:
+    def __init__(self, key: str, size: int, updated_at: float, accessed_at: float):
+        self.key = key
+        self.size = size
+        self.updated_at = updated_at
+        self.accessed_at = accessed_at
+
+    @property
+    def is_failure_page(self):
+        """Raw HTML saved when scraping or login failed"""
+        return self.key.endswith(".html")
 
 class FileCache:
     def __init__(self, cache_dir: str):
         self.cache_dir = cache_dir if cache_dir.endswith("/") else cache_dir + "/"
 
     def get(self, filename: str):
+        path = self.cache_dir + filename
         try:
-            with open(self.cache_dir + filename, "r") as f:
-                return f.read()
+            with open(path, "r") as f:
+                contents = f.read()
+                stat = os.fstat(f.fileno())
         except IOError:
             return None
+        # Eviction relies on access times, which noatime and relatime mounts don't update on reads
+        try:
+            os.utime(path, ns=(int(time.time() * 1e9), stat.st_mtime_ns))
+        except OSError:
+            pass
+        return contents
+
+    def get_many(self, filenames: Iterable[str]) -> Dict[str, str]:
+        result = {}
+        for filename in filenames:
+            if (contents := self.get(filename)) is not None:
+                result[filename] = contents
+        return result
 
     def add(self, filename: str, contents: str):
-        with open(self.cache_dir + filename, "w") as f:
-            f.write(contents)
+        # Write to a temporary file first, so readers never see a partially written file
+        (fd, path) = tempfile.mkstemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(contents)
+            os.replace(path, self.cache_dir + filename)
+        except:
+            os.remove(path)
+            raise
 
     def remove(self, filename: str):
         if os.path.exists(self.cache_dir + filename):
             os.remove(self.cache_dir + filename)
+
+    def remove_many(self, filenames: Iterable[str]):
+        for filename in filenames:
+            self.remove(filename)
+
+    def keys(self) -> List[str]:
+        return [x.name for x in os.scandir(self.cache_dir) if is_cache_file(x)]
+
+    def entries(self) -> List[CacheEntry]:
+        result = []
+        for entry in os.scandir(self.cache_dir):
+            if is_cache_file(entry):
+                stat = entry.stat()
+                result.append(CacheEntry(entry.name, stat.st_size, stat.st_mtime, stat.st_atime))
+        return result
+
+class SqliteCache:
+    """
+    Cache stored in a single indexed SQLite database file inside the cache directory.
+
+    Has the same interface as FileCache. Files of a FileCache in the same directory are imported when the database is created.
+    """
+
+    FILENAME = "cache.sqlite3"
+    # Bound parameters limit of older SQLite versions
+    BATCH_SIZE = 500
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir if cache_dir.endswith("/") else cache_dir + "/"
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.cache_dir + SqliteCache.FILENAME, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+
+    def _migrate(self):
+        (version,) = self.db.execute("PRAGMA user_version").fetchone()
+
+        if version < 1:
+            with self.lock, self.db:
+                self.db.execute("BEGIN")
+                self.db.execute("""
+                    CREATE TABLE IF NOT EXISTS entries (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                imported = self._import_files()
+                self.db.execute("PRAGMA user_version = 1")
+
+            if imported > 0:
+                logging.info(f"Imported {imported} cache files into {self.cache_dir + SqliteCache.FILENAME}. The files can now be deleted.")
+
+        if version < 2:
+            # Size and access time for cache eviction
+            with self.lock, self.db:
+                self.db.execute("BEGIN")
+                self.db.execute("ALTER TABLE entries ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self.db.execute("ALTER TABLE entries ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+                self.db.execute("UPDATE entries SET size = length(CAST(value AS BLOB)), accessed_at = updated_at")
+                self.db.execute("PRAGMA user_version = 2")
+
+    def _import_files(self) -> int:
+        """Copies FileCache files into the database, leaving the files in place."""
+
+        count = 0
+        for entry in os.scandir(self.cache_dir):
+            if not is_cache_file(entry):
+                continue
+            try:
+                with open(entry.path, "r") as f:
+                    contents = f.read()
+            except (IOError, UnicodeDecodeError):
+                logging.warning(f"Skipping cache file which can't be imported: {entry.path}")
+                continue
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, updated_at) VALUES (?, ?, ?)",
+                (entry.name, contents, entry.stat().st_mtime),
+            )
+            count += 1
+        return count
+
+    def get(self, filename: str):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM entries WHERE key = ?", (filename,)).fetchone()
+            if row is not None:
+                self.db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), filename))
+        return row[0] if row is not None else None
+
+    def get_many(self, filenames: Iterable[str]) -> Dict[str, str]:
+        filenames = list(filenames)
+        result = {}
+        for start in range(0, len(filenames), SqliteCache.BATCH_SIZE):
+            batch = filenames[start:start + SqliteCache.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            with self.lock:
+                rows = self.db.execute(f"SELECT key, value FROM entries WHERE key IN ({placeholders})", batch).fetchall()
+                self.db.execute(f"UPDATE entries SET accessed_at = ? WHERE key IN ({placeholders})", [time.time(), *batch])
+            result.update(rows)
+        return result
+
+    def add(self, filename: str, contents: str):
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries (key, value, updated_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (filename, contents, now, now, len(contents.encode())),
+            )
+
+    def remove(self, filename: str):
+        with self.lock:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (filename,))
+
+    def remove_many(self, filenames: Iterable[str]):
+        filenames = list(filenames)
+        for start in range(0, len(filenames), SqliteCache.BATCH_SIZE):
+            batch = filenames[start:start + SqliteCache.BATCH_SIZE]
+            with self.lock:
+                self.db.execute(f"DELETE FROM entries WHERE key IN ({', '.join('?' * len(batch))})", batch)
+
+    def entries(self) -> List[CacheEntry]:
+        with self.lock:
+            return [CacheEntry(*row) for row in self.db.execute("SELECT key, size, updated_at, accessed_at FROM entries")]
+
+    def vacuum(self):
+        """Returns space freed by removed entries back to the file system."""
+        with self.lock:
+            self.db.execute("VACUUM")
+
+    def keys(self) -> List[str]:
+        with self.lock:
+            return [row[0] for row in self.db.execute("SELECT key FROM entries")]
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+def is_cache_file(entry: os.DirEntry) -> bool:
+    return entry.is_file() and not entry.name.startswith(".") and DATABASE_SUFFIX not in entry.name
+
+def open_cache(cache_dir: str, backend: str = "sqlite") -> Union[FileCache, SqliteCache]:
+    if backend == "files":
+        return FileCache(cache_dir)
+    return SqliteCache(cache_dir)
@@ -0,0 +1,104 @@
+import logging
+import time
+from typing import Iterable, List, Union
+
+from amazon_scraper.amazon.cache import CacheEntry, FileCache, SqliteCache
+
+
+class CacheStats:
+    def __init__(self, entries: List[CacheEntry], expired: int):
+        orders = [x for x in entries if not x.is_failure_page]
+        failures = [x for x in entries if x.is_failure_page]
+        self.count = len(entries)
+        self.size = sum(x.size for x in entries)
+        self.order_count = len(orders)
+        self.order_size = sum(x.size for x in orders)
+        self.failure_count = len(failures)
+        self.failure_size = sum(x.size for x in failures)
+        self.expired = expired
+        self.oldest = min((x.updated_at for x in entries), default=None)
+        self.newest = max((x.updated_at for x in entries), default=None)
+
+    def __str__(self):
+        def date(timestamp: Union[float, None]):
+            return time.strftime("%Y-%m-%d %H:%M", time.localtime(timestamp)) if timestamp is not None else "-"
+
+        return "\n".join([
+            f"Entries: {self.count} ({format_size(self.size)})",
+            f"  orders and session: {self.order_count} ({format_size(self.order_size)})",
+            f"  failure pages: {self.failure_count} ({format_size(self.failure_size)})",
+            f"  expired: {self.expired}",
+            f"Oldest entry: {date(self.oldest)}",
+            f"Newest entry: {date(self.newest)}",
+        ])
+
+class CachePolicy:
+    """
+    Limits cache growth: entries older than `ttl` seconds expire, and least recently used entries are
+    evicted once failure pages exceed `max_failure_size` or the whole cache exceeds `max_size` bytes.
+
+    Entries listed in `keep` (e.g. the login session) are never removed.
+    """
+
+    def __init__(
+        self,
+        ttl: Union[float, None] = None,
+        max_size: Union[int, None] = None,
+        max_failure_size: Union[int, None] = None,
+        keep: Iterable[str] = (),
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_failure_size = max_failure_size
+        self.keep = set(keep)
+
+    def is_expired(self, entry: CacheEntry, now: float):
+        return self.ttl is not None and entry.key not in self.keep and now - entry.updated_at > self.ttl
+
+    def stats(self, cache: Union[FileCache, SqliteCache]) -> CacheStats:
+        entries = cache.entries()
+        now = time.time()
+        return CacheStats(entries, len([x for x in entries if self.is_expired(x, now)]))
+
+    def prune(self, cache: Union[FileCache, SqliteCache]) -> List[CacheEntry]:
+        """Removes expired and evicted entries and returns them."""
+
+        now = time.time()
+        entries = cache.entries()
+        removed = [x for x in entries if self.is_expired(x, now)]
+        # Least recently used go first
+        remaining = sorted([x for x in entries if not self.is_expired(x, now)], key=lambda x: x.accessed_at)
+        evictable = [x for x in remaining if x.key not in self.keep]
+
+        if self.max_failure_size is not None:
+            failures = [x for x in evictable if x.is_failure_page]
+            removed.extend(evict(failures, sum(x.size for x in remaining if x.is_failure_page), self.max_failure_size))
+
+        if self.max_size is not None:
+            removed_keys = set(x.key for x in removed)
+            evictable = [x for x in evictable if x.key not in removed_keys]
+            total = sum(x.size for x in remaining if x.key not in removed_keys)
+            removed.extend(evict(evictable, total, self.max_size))
+
+        if len(removed) > 0:
+            cache.remove_many([x.key for x in removed])
+            logging.info(f"Removed {len(removed)} cache entries ({format_size(sum(x.size for x in removed))})")
+        return removed
+
+def evict(entries: List[CacheEntry], total: int, limit: int) -> List[CacheEntry]:
+    """Returns leading entries which should be removed to fit the total size into the limit."""
+
+    result = []
+    for entry in entries:
+        if total <= limit:
+            break
+        result.append(entry)
+        total -= entry.size
+    return result
+
+def format_size(size: int):
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
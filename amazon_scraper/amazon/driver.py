@@ -2,17 +2,21 @@ import logging
 import random
 import sys
 import time
+from typing import List
 
-from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
 from selenium.webdriver.common.by import By
 
+from amazon_scraper.amazon.throttle import TokenBucket
+from amazon_scraper.metrics import METRICS
+
 
 class AmazonDriver:
     """
     Selenium driver wrapper handling Amazon login.
     """
 
-    def __init__(self):
+    def __init__(self, throttle: TokenBucket):
         from selenium import webdriver
         from selenium.webdriver.firefox.options import Options
 
@@ -20,6 +24,7 @@ class AmazonDriver:
         options.headless = True
         self.driver = webdriver.Firefox(options=options)
         self.driver.implicitly_wait(5)
+        self.throttle = throttle
 
     def login(self, host, email, password):
         driver = self.driver
@@ -49,9 +54,34 @@ class AmazonDriver:
         driver.find_element(By.ID, "ap_password").send_keys(password)
         driver.find_element(By.ID, "signInSubmit").click()
 
+    def get_cookies(self) -> List[dict]:
+        return self.driver.get_cookies()
+
+    @property
+    def user_agent(self) -> str:
+        return self.driver.execute_script("return navigator.userAgent")
+
+    def restore_session(self, host, cookies: List[dict]) -> bool:
+        """Loads cookies of a previous session and returns whether it is still logged in."""
+
+        driver = self.driver
+        # Cookies can only be set for the currently opened domain
+        driver.get(f"{host}/?language=en_GB")
+        driver.delete_all_cookies()
+        for cookie in cookies:
+            try:
+                driver.add_cookie(cookie)
+            except WebDriverException:
+                logging.debug(f"Skipping cookie {cookie.get('name')} which can't be restored")
+
+        # Order history redirects to the sign in form when the session is expired
+        self.get_url(f"{host}/gp/css/order-history")
+        return "/ap/signin" not in driver.current_url
+
     def get_url(self, url):
+        # The rate limit is shared by all drivers, so it replaces the per-call `rand_sleep`
+        self.throttle.acquire()
         self.driver.get(url)
-        rand_sleep()
         return self.driver.page_source
 
     def clean_up(self):
@@ -67,3 +97,4 @@ def rand_sleep(max_seconds=5):
     logging.debug(f"Sleeping for {seconds} seconds...")
     sys.stdout.flush()
     time.sleep(seconds)
+    METRICS.increment("sleep_seconds", seconds, reason="rand_sleep")
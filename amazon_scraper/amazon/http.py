@@ -0,0 +1,65 @@
+import logging
+import threading
+from typing import List, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.cookies import create_cookie
+
+from amazon_scraper.amazon.throttle import TokenBucket
+
+# Pages which can only be passed in a real browser
+CHALLENGE_URLS = ["/ap/signin", "/ap/mfa", "/errors/validateCaptcha"]
+CHALLENGE_MARKERS = ['action="/errors/validateCaptcha"', 'name="signIn"']
+
+
+class AmazonHttpClient:
+    """
+    Plain HTTP page loader reusing cookies of a logged-in Selenium session.
+
+    Returns no page when Amazon responds with a login or captcha challenge, which should then be passed with a browser.
+    """
+
+    def __init__(self, throttle: TokenBucket, pool_size: int = 4, timeout: float = 30):
+        self.throttle = throttle
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.has_session = False
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def set_session(self, cookies: List[dict], user_agent: Union[str, None]):
+        """Replaces the session with cookies in Selenium `get_cookies` format."""
+
+        with self.lock:
+            self.session.cookies.clear()
+            for cookie in cookies:
+                self.session.cookies.set_cookie(create_cookie(
+                    name=cookie["name"],
+                    value=cookie["value"],
+                    domain=cookie.get("domain", ""),
+                    path=cookie.get("path", "/"),
+                    secure=cookie.get("secure", False),
+                    expires=cookie.get("expiry"),
+                ))
+            if user_agent is not None:
+                # Amazon binds sessions to the browser they were created with
+                self.session.headers["User-Agent"] = user_agent
+            self.has_session = len(cookies) > 0
+
+    def get_url(self, url: str) -> Union[str, None]:
+        self.throttle.acquire()
+        response = self.session.get(url, timeout=self.timeout)
+
+        if any(x in response.url for x in CHALLENGE_URLS) or any(x in response.text for x in CHALLENGE_MARKERS):
+            logging.debug(f"HTTP request was challenged: {response.url}")
+            return None
+
+        response.raise_for_status()
+        return response.text
+
+    def clean_up(self):
+        self.session.close()
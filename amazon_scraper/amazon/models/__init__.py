@@ -1,3 +1,4 @@
+from .history import AmazonOrderCard
 from .order import AmazonOrder
 from .shipment import AmazonShipment
 from .shipment_item import AmazonShipmentItem
@@ -1,6 +1,9 @@
 import re
 
 PRODUCT_HREF_RE = re.compile(r".+\/product\/[^/]+")
-SUMMARY_PROMO_RE = re.compile(r"Promotion Applied\: -\w+ ([\d.,]+)")
-ITEM_PRICE_RE = re.compile(r"(€)([\d.,]+)")
+# Prices are parsed by the storefront, see prices.py
+SUMMARY_PROMO_RE = re.compile(r"^Promotion Applied\:?(.+)$", re.MULTILINE)
+# 3 March 2023 - Visa ending in 1234: €20.00
+CHARGE_RE = re.compile(r"^(\d{1,2} \w+ \d{4}) - .+: (.+)$", re.MULTILINE)
 REFUND_RE = re.compile(r"^(Return|Replacement) ")
+ORDER_ID_RE = re.compile(r"\b(?:D\d{2}|\d{3})-\d{7}-\d{7}\b")
@@ -0,0 +1,107 @@
+import re
+from datetime import date, datetime
+from typing import List, Tuple, Union
+
+from amazon_scraper.amazon.models.common import *
+from amazon_scraper.amazon.models.order import AmazonOrder
+from amazon_scraper.amazon.models.prices import Storefront
+from amazon_scraper.amazon.models.shipment import AmazonShipment
+from amazon_scraper.money import Money
+from bs4 import BeautifulSoup
+from bs4.element import Tag
+
+
+class AmazonOrderCard:
+    """
+    Order as shown on the order history page.
+
+    `order` is set only when the card has enough details to be used instead of the order details page:
+    all item prices are shown and add up to the order total, so there are no promotions or delivery costs.
+    """
+
+    def __init__(self, order_id: str, date: Union[date, None], total: Union[Money, None], order: Union[AmazonOrder, None]):
+        self.order_id = order_id
+        self.date = date
+        self.total = total
+        self.order = order
+
+    @staticmethod
+    def from_card(card: Tag, host: str):
+        header = card.select_one("div.order-header") or card
+        match = ORDER_ID_RE.search(header.text)
+        assert match is not None, "No order ID found"
+        order_id = match.group(0)
+
+        values = AmazonOrderCard._parse_header(header)
+        order_date = AmazonOrderCard._parse_date(values.get("order placed"))
+        total = AmazonOrderCard._parse_total(values.get("total"), Storefront.for_host(host))
+
+        return AmazonOrderCard(
+            order_id,
+            order_date,
+            total,
+            AmazonOrderCard._parse_order(card, order_id, total, host),
+        )
+
+    @staticmethod
+    def _parse_header(header: Tag):
+        # div.order-header div.a-fixed-right-grid-col div.a-column > [span.label, span.value]
+        values = {}
+        for column in header.select("div.a-column"):
+            label = column.select_one("span.label, span.a-text-caps")
+            value = column.select_one("span.value, div.a-row:nth-of-type(2) span")
+            if label is not None and value is not None:
+                values[re.sub(r"\s+", " ", label.text.strip()).lower()] = value.text.strip()
+        return values
+
+    @staticmethod
+    def _parse_date(text: Union[str, None]):
+        if text is None:
+            return None
+        try:
+            return datetime.strptime(text, "%d %B %Y").date()
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _parse_total(text: Union[str, None], storefront: Storefront):
+        try:
+            return storefront.parse_money(text) if text is not None else None
+        except AssertionError:
+            return None
+
+    @staticmethod
+    def _parse_order(card: Tag, order_id: str, total: Union[Money, None], host: str):
+        if total is None:
+            return None
+        try:
+            shipments = [AmazonShipment.from_details(x, host) for x in card.select("div.shipment")]
+        except (AssertionError, AttributeError, TypeError, KeyError):
+            return None # Item prices are not shown
+
+        if len(shipments) == 0 or any(x.is_refund for x in shipments):
+            return None
+        if sum([x.amount for x in shipments], Money.zero(total.currency)) != total:
+            return None
+
+        return AmazonOrder(
+            f"{host}/gp/your-account/order-details?orderID={order_id}",
+            f"Grand Total: {total.currency} {total}",
+            "",
+            shipments,
+        )
+
+    @staticmethod
+    def parse_page(html: str, host: str) -> Tuple[List["AmazonOrderCard"], bool]:
+        """Returns order cards of an order history page and whether there is a next page."""
+
+        soup = BeautifulSoup(html, "lxml")
+        # Class names differ between page layout versions
+        tags = soup.select("div.js-order-card") or soup.select("div.order-card") or soup.select("div#ordersContainer > div.order")
+        cards = {}
+        for tag in tags:
+            card = AmazonOrderCard.from_card(tag, host)
+            cards.setdefault(card.order_id, card)
+        # ul.a-pagination li.a-last a
+        has_next = soup.select_one("ul.a-pagination li.a-last:not(.a-disabled) a") is not None
+        return (list(cards.values()), has_next)
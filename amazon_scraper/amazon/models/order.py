@@ -1,25 +1,53 @@
 import json
-from functools import cached_property
-from typing import List
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Tuple, Union
 
 from amazon_scraper.amazon.models.common import *
+from amazon_scraper.amazon.models.prices import Storefront
 from amazon_scraper.amazon.models.shipment import AmazonShipment
+from amazon_scraper.money import Money
+from bs4 import BeautifulSoup, SoupStrainer
 from bs4.element import Tag
 
+# Only the order details subtree is built, the rest of the page is skipped while parsing
+ORDER_DETAILS_STRAINER = SoupStrainer("div", id="orderDetails")
+
 
 class AmazonOrder:
-    def __init__(self, url: str, summary: str, transactions: str, shipments: List[AmazonShipment]):
+    __slots__ = ("url", "summary", "transactions", "shipments", "promotion", "_charges")
+
+    def __init__(self, url: str, summary: str, transactions: str, shipments: List[AmazonShipment], promotion: Union[Money, Decimal, str, None] = None):
         assert len(shipments) > 0, "Order cannot exist without shipments"
         self.url = url
         self.summary = summary
         self.transactions = transactions
         self.shipments = shipments
+        # Parsed once from the summary, older caches don't have it or have it as a number
+        currency = shipments[0].currency
+        if promotion is None:
+            promotion = AmazonOrder._parse_promotion(summary, Storefront.for_host(url), currency)
+        elif not isinstance(promotion, Money):
+            promotion = Money.from_decimal(Decimal(str(promotion)), currency)
+        self.promotion = promotion
+        self._charges = None
+
+    @staticmethod
+    def from_html(html: str, url: str, host: str):
+        # Skip tokenizing the page header by starting right at the order details tag
+        index = html.find('id="orderDetails"')
+        start = html.rfind("<", 0, index) if index >= 0 else -1
+        soup = BeautifulSoup(html[start:] if start >= 0 else html, "lxml", parse_only=ORDER_DETAILS_STRAINER)
+        # div#a-page div#orderDetails
+        details = soup.select_one("div#orderDetails")
+        assert details is not None, "No #orderDetails section found"
+        return AmazonOrder.from_details(details, url, host)
 
     @staticmethod
     def from_details(details: Tag, url: str, host: str):
+        # div#a-page div#orderDetails div.a-box-group.a-spacing-base div.a-box.a-first div.a-box-inner div.a-fixed-right-grid div.a-fixed-right-grid-inner div#od-subtotals.a-fixed-right-grid-col.a-col-right
         return AmazonOrder(
             url,
-            # div#a-page div#orderDetails div.a-box-group.a-spacing-base div.a-box.a-first div.a-box-inner div.a-fixed-right-grid div.a-fixed-right-grid-inner div#od-subtotals.a-fixed-right-grid-col.a-col-right
             AmazonOrder._parse_summary(details.select_one("div#od-subtotals")),
             # div#a-page div#orderDetails div.a-box-group.a-spacing-base div.a-box.a-last div.a-box-inner div.a-row.a-expander-container.a-expander-inline-container.show-if-no-js
             AmazonOrder._parse_transactions(details.select_one("div.a-box-group div.a-box.a-last div.a-row")),
@@ -43,6 +71,29 @@ class AmazonOrder:
             re.sub(r"\s+", " ", row.text.strip()) for row in transactions.select("div.a-row")
         ])
 
+    @staticmethod
+    def _parse_promotion(summary: str, storefront: Storefront, currency: str):
+        """Returns the sum of all applied promotions as a positive amount."""
+        return sum([abs(storefront.parse_money(line)) for line in SUMMARY_PROMO_RE.findall(summary)], Money.zero(currency))
+
+    @property
+    def charges(self) -> List[Tuple[date, Money]]:
+        """Payments listed in the order transactions, lines which can't be parsed (e.g. other languages) are skipped."""
+
+        if self._charges is None:
+            self._charges = self._parse_charges()
+        return self._charges
+
+    def _parse_charges(self) -> List[Tuple[date, Money]]:
+        storefront = Storefront.for_host(self.url)
+        result = []
+        for (day, price) in CHARGE_RE.findall(self.transactions):
+            try:
+                result.append((datetime.strptime(day, "%d %B %Y").date(), storefront.parse_money(price)))
+            except (ValueError, AssertionError):
+                continue
+        return result
+
     @staticmethod
     def _join_refunds(shipments: List[AmazonShipment]):
         result = []
@@ -55,10 +106,13 @@ class AmazonOrder:
 
     @staticmethod
     def from_json(json):
-        return AmazonOrder(**{
-            **json,
-            "shipments": [AmazonShipment.from_json(item) for item in json["shipments"]]
-        })
+        return AmazonOrder(
+            url=json["url"],
+            summary=json["summary"],
+            transactions=json["transactions"],
+            shipments=[AmazonShipment.from_json(item) for item in json["shipments"]],
+            promotion=Money.from_json(json["promotion"]) if isinstance(json.get("promotion"), dict) else json.get("promotion"),
+        )
 
     def __str__(self):
         return "{}\nSummary:\n{}\nTransactions:\n{}\nShipments:\n{}".format(
@@ -69,9 +123,10 @@ class AmazonOrder:
         )
 
     def to_json(self):
-        return json.dumps(self, default=lambda o: o.__dict__)
+        return json.dumps(self, default=json_default)
 
-    @cached_property
-    def promotion(self):
-        matches = SUMMARY_PROMO_RE.findall(self.summary)
-        return float(matches[0].replace(",", ".")) if len(matches) > 0 else 0.0
+def json_default(object):
+    """Serializes public model fields, private slots hold values derived from them which can't be passed back to the initializer."""
+    if isinstance(object, Money):
+        return object.to_json()
+    return {key: getattr(object, key) for key in type(object).__slots__ if not key.startswith("_")}
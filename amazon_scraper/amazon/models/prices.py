@@ -0,0 +1,131 @@
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+from urllib.parse import urlparse
+
+from amazon_scraper.money import Money
+
+# Currency symbols and codes shown by Amazon storefronts, the storefront table overrides ambiguous ones like "$"
+CURRENCY_SYMBOLS = {
+    "€": "EUR", "EUR": "EUR",
+    "£": "GBP", "GBP": "GBP",
+    "$": "USD", "US$": "USD", "USD": "USD",
+    "CDN$": "CAD", "CAD": "CAD",
+    "A$": "AUD", "AUD": "AUD",
+    "¥": "JPY", "￥": "JPY", "JPY": "JPY",
+    "zł": "PLN", "PLN": "PLN",
+    "kr": "SEK", "SEK": "SEK",
+    "TL": "TRY", "TRY": "TRY",
+    "₹": "INR", "INR": "INR",
+    "CHF": "CHF",
+}
+# Digits with optional thousands separators and decimals: 1234 | 1,234.56 | 1.234,56 | 1 234,56 | 1'234.56
+NUMBER = r"\d+(?:[.,'\u00a0\u202f ]\d{3})*(?:[.,]\d{1,2})?(?!\d)"
+SPACES_RE = re.compile(r"['\s\u00a0\u202f]")
+
+
+class Storefront:
+    """
+    Price format of an Amazon storefront.
+
+    `decimal_mark` only resolves ambiguous numbers like "1.234", otherwise the last separator followed
+    by other than three digits is treated as the decimal mark, so both "€1,234.56" and "1.234,56 €" work.
+    """
+
+    def __init__(self, domain: Union[str, None], currency: str, decimal_mark: str, symbols: Union[Dict[str, str], None] = None):
+        self.domain = domain
+        self.currency = currency
+        self.decimal_mark = decimal_mark
+        self.symbols = {**CURRENCY_SYMBOLS, **(symbols or {})}
+
+        # Letter symbols like "kr" shouldn't match inside words
+        alternatives = "(?<![A-Za-z])(?:" + "|".join(re.escape(x) for x in sorted(self.symbols, key=len, reverse=True)) + ")(?![A-Za-z])"
+        self.price_re = re.compile(
+            rf"(?P<sign>-)?\s*(?:(?P<before>{alternatives})\s*(?P<sign2>-)?\s*(?P<amount>{NUMBER})|(?P<amount2>{NUMBER})\s*(?P<after>{alternatives}))"
+        )
+
+    def parse_price(self, text: str) -> Tuple[str, Decimal]:
+        """Returns currency code and amount of the first price in the text."""
+
+        match = self.price_re.search(text)
+        assert match is not None, f"No price found in {text!r}"
+        symbol = match.group("before") or match.group("after")
+        amount = self.parse_number(match.group("amount") or match.group("amount2"))
+        if match.group("sign") or match.group("sign2"):
+            amount = -amount
+        return (self.symbols[symbol], amount)
+
+    def parse_money(self, text: str) -> Money:
+        """Returns the first price in the text."""
+        (currency, amount) = self.parse_price(text)
+        return Money.from_decimal(amount, currency)
+
+    def parse_prices(self, text: str) -> List[Tuple[str, Decimal]]:
+        return [self.parse_price(x.group(0)) for x in self.price_re.finditer(text)]
+
+    def parse_number(self, text: str) -> Decimal:
+        number = SPACES_RE.sub("", text)
+        separators = [x for x in ".," if x in number]
+
+        if len(separators) == 2:
+            decimal_mark = number[max(number.rfind("."), number.rfind(","))]
+        elif len(separators) == 1:
+            separator = separators[0]
+            decimals = len(number) - number.rfind(separator) - 1
+            if number.count(separator) > 1:
+                decimal_mark = None
+            elif decimals != 3:
+                decimal_mark = separator
+            else:
+                decimal_mark = separator if separator == self.decimal_mark else None
+        else:
+            decimal_mark = None
+
+        if decimal_mark is None:
+            return Decimal(number.replace(".", "").replace(",", ""))
+        (integer, fraction) = number.rsplit(decimal_mark, 1)
+        return Decimal(integer.replace(".", "").replace(",", "") + "." + fraction)
+
+    @staticmethod
+    def for_host(host: Union[str, None]) -> "Storefront":
+        """Returns the storefront of an Amazon host or order URL."""
+
+        hostname = urlparse(host).hostname if host is not None and "//" in host else host
+        return Storefront._for_hostname((hostname or "").lower())
+
+    @staticmethod
+    @lru_cache(maxsize=64) # Keyed by hostname, callers pass every order and item URL
+    def _for_hostname(hostname: str) -> "Storefront":
+        for storefront in STOREFRONTS:
+            if hostname == storefront.domain or hostname.endswith("." + storefront.domain):
+                return storefront
+        return DEFAULT_STOREFRONT
+
+    def __repr__(self):
+        return f"Storefront({self.domain})"
+
+# Longer domains go first, so amazon.com.au isn't taken for amazon.com
+STOREFRONTS = sorted([
+    Storefront("amazon.de", "EUR", ","),
+    Storefront("amazon.fr", "EUR", ","),
+    Storefront("amazon.it", "EUR", ","),
+    Storefront("amazon.es", "EUR", ","),
+    Storefront("amazon.nl", "EUR", ","),
+    Storefront("amazon.com.be", "EUR", ","),
+    Storefront("amazon.co.uk", "GBP", "."),
+    Storefront("amazon.com", "USD", "."),
+    Storefront("amazon.ca", "CAD", ".", {"$": "CAD"}),
+    Storefront("amazon.com.au", "AUD", ".", {"$": "AUD"}),
+    Storefront("amazon.com.mx", "MXN", ".", {"$": "MXN", "MXN": "MXN"}),
+    Storefront("amazon.co.jp", "JPY", "."),
+    Storefront("amazon.pl", "PLN", ","),
+    Storefront("amazon.se", "SEK", ","),
+    Storefront("amazon.com.tr", "TRY", ","),
+    Storefront("amazon.in", "INR", "."),
+], key=lambda x: len(x.domain), reverse=True)
+DEFAULT_STOREFRONT = Storefront(None, "EUR", ".")
+
+def currency_code(currency: str) -> str:
+    """Returns ISO code of a currency symbol, codes are returned as is."""
+    return CURRENCY_SYMBOLS.get(currency, currency)
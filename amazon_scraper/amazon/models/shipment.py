@@ -1,15 +1,18 @@
-from functools import cached_property
 from typing import List
 
 from amazon_scraper.amazon.models.common import *
 from amazon_scraper.amazon.models.shipment_item import AmazonShipmentItem
+from amazon_scraper.money import Money
 from bs4.element import Tag
 
 
 class AmazonShipment:
+    __slots__ = ("title", "items", "_amount")
+
     def __init__(self, title: str, items: List[AmazonShipmentItem]):
         self.title = title
         self.items = items
+        self._amount = None
 
     @staticmethod
     def from_details(shipment: Tag, host: str):
@@ -34,22 +37,24 @@ class AmazonShipment:
 
     @staticmethod
     def from_json(json):
-        return AmazonShipment(**{
-            **json,
-            "items": [AmazonShipmentItem.from_json(item) for item in json["items"]]
-        })
+        return AmazonShipment(
+            title=json["title"],
+            items=[AmazonShipmentItem.from_json(item) for item in json["items"]],
+        )
 
     def __str__(self):
         return f"{self.title} | {self.currency} {self.amount}" + "\n- " + "\n- ".join([str(item) for item in self.items])
 
-    @cached_property
+    @property
     def currency(self):
         return self.items[0].currency
 
-    @cached_property
+    @property
     def amount(self):
-        return f'{sum([float(item.amount) * float(item.quantity) for item in self.items]):.2f}'
+        if self._amount is None:
+            self._amount = sum([item.amount * item.quantity for item in self.items], Money.zero(self.currency))
+        return self._amount
 
-    @cached_property
+    @property
     def is_refund(self):
         return REFUND_RE.match(self.title) is not None
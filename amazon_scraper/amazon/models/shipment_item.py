@@ -1,35 +1,54 @@
-from functools import cached_property
+from decimal import Decimal
+from typing import Union
 
 from amazon_scraper.amazon.models.common import *
+from amazon_scraper.amazon.models.prices import Storefront, currency_code
+from amazon_scraper.money import Money
 from bs4.element import Tag
 
 
 class AmazonShipmentItem:
-    def __init__(self, url: str, name: str, currency: str, amount: str, quantity: int):
+    __slots__ = ("url", "name", "amount", "quantity")
+
+    def __init__(self, url: str, name: str, currency: str, amount: Union[Money, Decimal, str], quantity: int):
         self.url = url
         self.name = name
-        self.currency = currency
-        self.amount = amount.replace(",", ".")
+        if not isinstance(amount, Money):
+            # Older caches have currency symbols and amounts as strings
+            amount = amount if isinstance(amount, Decimal) else Storefront.for_host(url).parse_number(amount)
+            amount = Money.from_decimal(amount, currency_code(currency))
+        self.amount = amount
         self.quantity = quantity
 
     @staticmethod
     def from_details(link: Tag, price: Tag, quantity: Tag, host: str):
-        (currency, amount) = ITEM_PRICE_RE.match(price.text.strip()).groups()
+        amount = Storefront.for_host(host).parse_money(price.text.strip())
         return AmazonShipmentItem(
             host + PRODUCT_HREF_RE.match(link["href"]).group(0),
             link.text.strip(),
-            currency,
+            amount.currency,
             amount,
             int(quantity.text.strip()) if quantity is not None else 1,
         )
 
     @staticmethod
     def from_json(json):
-        return AmazonShipmentItem(**json)
+        amount = json["amount"]
+        return AmazonShipmentItem(
+            url=json["url"],
+            name=json["name"],
+            currency=amount["currency"] if isinstance(amount, dict) else json["currency"],
+            amount=Money.from_json(amount) if isinstance(amount, dict) else amount,
+            quantity=json["quantity"],
+        )
 
     def __str__(self):
         return f"{self.price_note} @ {self.url} | {self.name}"
 
-    @cached_property
+    @property
+    def currency(self):
+        return self.amount.currency
+
+    @property
     def price_note(self):
         return f'{self.currency} {self.amount}{f" x{self.quantity}" if self.quantity > 1 else ""}'
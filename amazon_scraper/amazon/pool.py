@@ -0,0 +1,106 @@
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+if TYPE_CHECKING:
+    from amazon_scraper.amazon.driver import AmazonDriver
+
+
+class DriverPool:
+    """
+    Pool of up to `size` logged-in Amazon drivers.
+
+    Drivers are created with `factory` on demand, so a run which finds everything in cache never starts a browser.
+    """
+
+    def __init__(self, factory: Callable[[], "AmazonDriver"], size: int = 1):
+        self.factory = factory
+        self.size = max(size, 1)
+        self.drivers: List["AmazonDriver"] = []
+        self.idle: "queue.Queue[AmazonDriver]" = queue.Queue()
+        self.last_used: Dict[int, float] = {}
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def driver(self):
+        """Borrows a driver for the duration of the `with` block."""
+
+        driver = self._acquire()
+        try:
+            yield driver
+        finally:
+            with self.lock:
+                self.last_used[id(driver)] = time.monotonic()
+            self.idle.put(driver)
+
+    def _acquire(self) -> "AmazonDriver":
+        while True:
+            try:
+                return self.idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self.lock:
+                can_create = len(self.drivers) < self.size
+                if can_create:
+                    # Reserve the slot while logging in, so concurrent callers don't exceed the pool size
+                    self.drivers.append(None)
+
+            if can_create:
+                return self._create()
+
+            try:
+                # Wake up periodically in case a driver slot was freed by a failed login
+                return self.idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _create(self) -> "AmazonDriver":
+        try:
+            driver = self.factory()
+        except:
+            with self.lock:
+                self.drivers.remove(None)
+            raise
+
+        with self.lock:
+            self.drivers[self.drivers.index(None)] = driver
+        return driver
+
+    def recycle_idle(self, max_idle: float) -> int:
+        """Quits drivers which weren't used for `max_idle` seconds to free their memory, returns their number."""
+
+        now = time.monotonic()
+        recycled = []
+        kept = []
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            with self.lock:
+                is_idle = now - self.last_used.get(id(driver), now) >= max_idle
+                if is_idle:
+                    self.drivers.remove(driver)
+                    self.last_used.pop(id(driver), None)
+            (recycled if is_idle else kept).append(driver)
+
+        for driver in kept:
+            self.idle.put(driver)
+        for driver in recycled:
+            driver.clean_up()
+        if len(recycled) > 0:
+            logging.info(f"Closed {len(recycled)} idle browser sessions")
+        return len(recycled)
+
+    def clean_up(self):
+        with self.lock:
+            drivers = [x for x in self.drivers if x is not None]
+            self.drivers = []
+            self.idle = queue.Queue()
+            self.last_used = {}
+        for driver in drivers:
+            driver.clean_up()
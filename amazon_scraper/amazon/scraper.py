@@ -1,11 +1,27 @@
 import json
 import logging
 import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from typing import TYPE_CHECKING, Dict, Iterator, List, Tuple, Union
 
-from amazon_scraper.amazon.cache import FileCache
-from amazon_scraper.amazon.driver import AmazonDriver
-from amazon_scraper.amazon.models import AmazonOrder
-from bs4 import BeautifulSoup
+from amazon_scraper.amazon.cache import open_cache
+from amazon_scraper.amazon.cache_policy import CachePolicy
+from amazon_scraper.amazon.pool import DriverPool
+from amazon_scraper.amazon.throttle import TokenBucket
+from amazon_scraper.metrics import METRICS
+
+# Selenium, requests and the bs4 based models are imported on first use, so cache maintenance starts fast
+if TYPE_CHECKING:
+    from amazon_scraper.amazon.archive import HtmlArchive
+    from amazon_scraper.amazon.driver import AmazonDriver
+    from amazon_scraper.amazon.http import AmazonHttpClient
+    from amazon_scraper.amazon.models import AmazonOrder, AmazonOrderCard
+
+SESSION_COOKIES = "cookies.json"
+SESSION_USER_AGENT = "user_agent.txt"
+# Consecutive challenged HTTP requests after which only Selenium is used
+MAX_HTTP_CHALLENGES = 3
 
 
 class AmazonScraperSetupException(Exception):
@@ -19,48 +35,236 @@ class AmazonScraper:
         user: str,
         password: str,
         cache_dir: str,
+        sessions: int = 1,
+        requests_per_minute: float = 15,
+        backend: str = "selenium",
+        cache_backend: str = "sqlite",
+        cache_policy: Union[CachePolicy, None] = None,
+        archive: Union["HtmlArchive", None] = None,
+        dry_run: bool = False,
     ):
         self.host = host if host is None or not host.endswith('/') else host[:-1] # Remove trailing backslash
-        self.cache = FileCache(cache_dir)
-        self.setup_driver = lambda: self._setup_driver(user, password)
+        self.cache = open_cache(cache_dir, cache_backend)
+        self.cache_policy = cache_policy if cache_policy is not None else CachePolicy()
+        self.cache_policy.keep.update([SESSION_COOKIES, SESSION_USER_AGENT])
+        self.archive = archive
+        self.dry_run = dry_run # Cache entries aren't pruned
+        self.sessions = sessions
+        self.throttle = TokenBucket(rate=requests_per_minute / 60, burst=sessions)
+        self.pool = DriverPool(lambda: self._setup_driver(user, password), sessions)
+        # Selenium is still used to log in and to pass challenges when the HTTP backend is enabled
+        self.http = None
+        if backend == "http":
+            from amazon_scraper.amazon.http import AmazonHttpClient
+            self.http = AmazonHttpClient(self.throttle, pool_size=sessions)
+        self.http_challenges = 0
 
     def _setup_driver(self, user: str, password: str):
-        self.driver = AmazonDriver()
-        self.driver.login(self.host, user, password)
+        logging.debug("Setting up Selenium driver and logging in...")
+        from amazon_scraper.amazon.driver import AmazonDriver
+        try:
+            driver = AmazonDriver(self.throttle)
+        except Exception as e:
+            raise AmazonScraperSetupException from e
+
+        try:
+            if self._restore_session(driver):
+                logging.debug("Restored previous Amazon session")
+                return driver
+
+            driver.login(self.host, user, password)
+            self.cache.add(SESSION_COOKIES, json.dumps(driver.get_cookies()))
+            self.cache.add(SESSION_USER_AGENT, driver.user_agent)
+            return driver
+        except Exception as e:
+            self.cache.add("setup_driver.html", driver.driver.page_source)
+            driver.clean_up()
+            raise AmazonScraperSetupException from e
+
+    def _restore_session(self, driver: "AmazonDriver") -> bool:
+        cookies = self.cache.get(SESSION_COOKIES)
+        if cookies is None:
+            return False
+
+        try:
+            if driver.restore_session(self.host, json.loads(cookies)):
+                return True
+        except Exception:
+            logging.warning(f"Restoring saved Amazon session failed with error:\n{traceback.format_exc()}")
+
+        logging.info("Saved Amazon session has expired, logging in again...")
+        self.cache.remove(SESSION_COOKIES)
+        return False
 
     def _fetch_url(self, url: str):
-        return self.driver.get_url(url)
+        with METRICS.timer("page_fetch"):
+            return self._load_url(url)
+
+    def _load_url(self, url: str):
+        http = self.http # Can be disabled by another thread
+        if http is not None:
+            if not http.has_session:
+                self._load_http_session(http)
+
+            if http.has_session:
+                html = http.get_url(url)
+                if html is not None:
+                    self.http_challenges = 0
+                    return html
+                self._http_challenged()
+
+        with self.pool.driver() as driver:
+            html = driver.get_url(url)
+            if http is not None:
+                # The driver might have logged in again, so its cookies are the freshest
+                http.set_session(driver.get_cookies(), driver.user_agent)
+            return html
+
+    def _load_http_session(self, http: "AmazonHttpClient"):
+        cookies = self.cache.get(SESSION_COOKIES)
+        if cookies is not None:
+            http.set_session(json.loads(cookies), self.cache.get(SESSION_USER_AGENT))
+
+    def _http_challenged(self):
+        METRICS.increment("http_challenges")
+        self.http_challenges += 1
+        if self.http_challenges >= MAX_HTTP_CHALLENGES and self.http is not None:
+            logging.warning(f"HTTP requests were challenged {self.http_challenges} times in a row, using only Selenium from now on")
+            self.http = None
+        else:
+            logging.info("HTTP request was challenged, falling back to Selenium driver")
+
+    def prune_cache(self):
+        return self.cache_policy.prune(self.cache)
+
+    def recycle_idle_drivers(self, max_idle: float):
+        """Closes browsers which weren't used for `max_idle` seconds, they are started again on demand."""
+        return self.pool.recycle_idle(max_idle)
+
+    def clean_up(self):
+        self.pool.clean_up()
+        if self.http is not None:
+            self.http.clean_up()
 
     def scrape_order(self, order_id: str):
-        cache = self.cache.get(f"{order_id}.json")
-        if cache is not None:
+        """Returns cached or scraped order details. Safe to call from multiple threads, up to `sessions` pages are loaded at once."""
+
+        with METRICS.timer("cache_lookup"):
+            order = self._from_cache(order_id, self.cache.get(f"{order_id}.json"))
+        METRICS.increment("cache_hits" if order is not None else "cache_misses")
+        return order if order is not None else self._scrape(order_id)
+
+    def scrape_orders(self, order_ids: List[str]) -> Tuple[Dict[str, "AmazonOrder"], Dict[str, str]]:
+        """
+        Returns orders and scraping errors by order ID.
+
+        Cached orders are loaded with a single lookup, the rest are scraped by all sessions in parallel.
+        """
+
+        orders: Dict[str, "AmazonOrder"] = {}
+        errors: Dict[str, str] = {}
+        misses = []
+        with METRICS.timer("cache_lookup"):
+            cached = self.cache.get_many([f"{x}.json" for x in order_ids])
+            for order_id in order_ids:
+                order = self._from_cache(order_id, cached.get(f"{order_id}.json"))
+                if order is not None:
+                    orders[order_id] = order
+                else:
+                    misses.append(order_id)
+        METRICS.increment("cache_hits", len(orders))
+        METRICS.increment("cache_misses", len(misses))
+
+        logging.info(f"Found {len(orders)} of {len(order_ids)} orders in cache, scraping {len(misses)} orders...")
+        if len(misses) == 0:
+            return (orders, errors)
+
+        with ThreadPoolExecutor(max_workers=self.sessions, thread_name_prefix="scrape") as executor:
+            futures = {executor.submit(self._scrape, order_id): order_id for order_id in misses}
             try:
-                logging.debug(f"[{order_id}] Loading order from cache")
-                return AmazonOrder.from_json(json.loads(cache))
-            except:
-                logging.error(f"[{order_id}] Loading from cache failed with error:\n{traceback.format_exc()}")
-                pass
+                for future in as_completed(futures):
+                    order_id = futures[future]
+                    try:
+                        orders[order_id] = future.result()
+                    except AmazonScraperSetupException:
+                        raise
+                    except Exception:
+                        METRICS.increment("scrape_errors")
+                        errors[order_id] = traceback.format_exc()
+            except (KeyboardInterrupt, AmazonScraperSetupException):
+                # Leaving the executor waits for queued orders, which would otherwise all be scraped or try to log in again
+                for pending in futures:
+                    pending.cancel()
+                raise
+
+        return (orders, errors)
+
+    def cached_orders(self) -> Dict[str, "AmazonOrder"]:
+        """Returns all orders in the cache by order ID."""
+
+        from amazon_scraper.amazon.models.common import ORDER_ID_RE
 
+        keys = [x for x in self.cache.keys() if x.endswith(".json") and ORDER_ID_RE.fullmatch(x[:-len(".json")])]
+        orders = {}
+        for key, value in self.cache.get_many(keys).items():
+            order_id = key[:-len(".json")]
+            if (order := self._from_cache(order_id, value)) is not None:
+                orders[order_id] = order
+        return orders
+
+    def scrape_order_history(self, since: date, until: date) -> Iterator["AmazonOrderCard"]:
+        """Yields orders placed in the date range, walking order history pages from the latest orders."""
+
+        from amazon_scraper.amazon.models import AmazonOrderCard
+
+        for year in range(until.year, since.year - 1, -1):
+            start_index = 0
+            while True:
+                url = f"{self.host}/gp/your-account/order-history?orderFilter=year-{year}&startIndex={start_index}"
+                html = self._fetch_url(url)
+                try:
+                    (cards, has_next) = AmazonOrderCard.parse_page(html, self.host)
+                except:
+                    self.cache.add(f"order-history-{year}-{start_index}.html", html)
+                    raise
+
+                logging.debug(f"Found {len(cards)} orders on order history page {url}")
+                for card in cards:
+                    if card.date is not None and card.date > until:
+                        continue
+                    if card.date is not None and card.date < since:
+                        return # Orders are sorted from the latest
+                    yield card
+
+                if not has_next or len(cards) == 0:
+                    break
+                start_index += len(cards)
+
+    def _from_cache(self, order_id: str, cache: Union[str, None]):
+        if cache is None:
+            return None
+        from amazon_scraper.amazon.models import AmazonOrder
         try:
-            if "driver" not in self.__dict__:
-                logging.debug("Setting up Selenium driver and logging in...")
-                self.setup_driver()
-                self.setup_driver = lambda: None
+            logging.debug(f"[{order_id}] Loading order from cache")
+            return AmazonOrder.from_json(json.loads(cache))
         except:
-            self.cache.add("setup_driver.html", self.driver.driver.page_source)
-            raise AmazonScraperSetupException
+            logging.error(f"[{order_id}] Loading from cache failed with error:\n{traceback.format_exc()}")
+            return None
 
-        url = f"{self.host}/gp/your-account/order-details?orderID={order_id}"
+    def order_url(self, order_id: str):
+        return f"{self.host}/gp/your-account/order-details?orderID={order_id}"
+
+    def _scrape(self, order_id: str):
+        url = self.order_url(order_id)
         html = self._fetch_url(url)
+        if self.archive is not None:
+            # Archived even if parsing fails, so the order can be parsed again once the parser is fixed
+            self.archive.add(order_id, html)
 
+        from amazon_scraper.amazon.models import AmazonOrder
         try:
-            soup = BeautifulSoup(html, "lxml")
-            # self.soup = soup
-
-            # div#a-page div#orderDetails
-            details = soup.select_one("div#orderDetails")
-            assert details is not None, "No #orderDetails section found"
-            order = AmazonOrder.from_details(details, url, self.host)
+            with METRICS.timer("parse"):
+                order = AmazonOrder.from_html(html, url, self.host)
 
             self.cache.remove(f"{order_id}.html")
             self.cache.add(f"{order_id}.json", order.to_json())
@@ -69,4 +273,6 @@ class AmazonScraper:
         except:
             logging.error(f"[{order_id}] Loading from server failed with error:\n{traceback.format_exc()}")
             self.cache.add(f"{order_id}.html", html)
+            if self.cache_policy.max_failure_size is not None and not self.dry_run:
+                self.prune_cache()
             raise
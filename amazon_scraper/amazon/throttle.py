@@ -0,0 +1,41 @@
+import logging
+import threading
+import time
+
+from amazon_scraper.metrics import METRICS
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the total request rate towards Amazon.
+
+    Tokens are refilled at `rate` per second up to `burst` tokens; `acquire` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        assert rate > 0, "Rate should be positive"
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """Takes a token, waiting for it if necessary. Returns the number of seconds waited."""
+
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve the token right away so that concurrent callers queue up behind each other
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if delay > 0:
+            logging.debug(f"Rate limited for {delay:.1f} seconds...")
+            time.sleep(delay)
+            METRICS.increment("sleep_seconds", delay, reason="rate_limit")
+        return delay
@@ -1,19 +1,86 @@
 from argparse import Namespace
+from functools import cached_property
+from typing import TYPE_CHECKING, Callable, Union
 
-from .amazon.scraper import AmazonScraper
-from .firefly.api import FireflyAPI
+from .profiles import DEFAULT_QUERY, Profile
+from .state import ProcessingState
+
+if TYPE_CHECKING:
+    from .amazon.scraper import AmazonScraper
+    from .firefly.api import FireflyAPI
+    from .firefly.pipeline import CommitPipeline
 
 
 class AppArgs:
     def __init__(self, args: Namespace):
         self.dry_run: bool = args.dry_run
         self.cache_dir: str = args.cache_dir
+        self.cache_backend: str = args.cache_backend
+        self.cache_ttl_days: float = args.cache_ttl_days # Optional
+        self.cache_max_size: float = args.cache_max_size # Optional
+        self.cache_max_failure_size: float = args.cache_max_failure_size # Optional
+        self.archive_html: str = args.archive_html # Optional
+        self.amazon_sessions: int = args.amazon_sessions
+        self.amazon_rate_limit: float = args.amazon_rate_limit
+        self.amazon_backend: str = args.amazon_backend
+        self.firefly_pool_size: int = args.firefly_pool_size
+        self.firefly_retries: int = args.firefly_retries
+        self.firefly_timeout: float = args.firefly_timeout
+        self.commit_workers: int = args.commit_workers
+        self.commit_queue_size: int = args.commit_queue_size # Optional
+        self.commit_batch_size: int = args.commit_batch_size
+        self.match_time_budget: float = args.match_time_budget
+        self.metrics_file: str = args.metrics_file # Optional
         self.log: str = args.log # Optional
         self.log_level: str = args.log_level
+        self.profiles: str = args.profiles # Optional
+        self.namespace: Namespace = args # Includes action specific arguments
 
 class Runner:
-    def __init__(self, amazon: AmazonScraper, firefly: FireflyAPI, args: AppArgs):
-        self.amazon = amazon
-        self.firefly = firefly
+    """
+    Services shared by actions.
+
+    Amazon and Firefly clients can be given as factories instead, then they are created on first use,
+    so actions which don't need a client don't pay for importing Selenium, bs4 or requests.
+    With several account profiles there is one runner per profile, all sharing one Firefly client.
+    """
+
+    def __init__(
+        self,
+        amazon: Union["AmazonScraper", None],
+        firefly: Union["FireflyAPI", None],
+        args: AppArgs,
+        state: Union[ProcessingState, None] = None,
+        amazon_factory: Union[Callable[[], "AmazonScraper"], None] = None,
+        firefly_factory: Union[Callable[[], "FireflyAPI"], None] = None,
+        profile: Union[Profile, None] = None,
+    ):
+        if amazon is not None:
+            self.amazon = amazon
+        if firefly is not None:
+            self.firefly = firefly
+        self.amazon_factory = amazon_factory
+        self.firefly_factory = firefly_factory
         self.args = args
-        self.base_query = "destination_account_starts:AMAZON"
+        self.state = state
+        self.profile = profile
+        self.base_query = profile.query if profile is not None else DEFAULT_QUERY
+
+    def fork(self) -> "Runner":
+        """Returns a runner sharing clients and state, with its own commit pipeline."""
+        return Runner(self.amazon, self.firefly, self.args, self.state, profile=self.profile)
+
+    @cached_property
+    def amazon(self) -> "AmazonScraper":
+        assert self.amazon_factory is not None, "No Amazon scraper was set up"
+        return self.amazon_factory()
+
+    @cached_property
+    def firefly(self) -> "FireflyAPI":
+        assert self.firefly_factory is not None, "No Firefly API was set up"
+        return self.firefly_factory()
+
+    @cached_property
+    def commits(self) -> "CommitPipeline":
+        from .firefly.pipeline import CommitPipeline
+        return CommitPipeline(self.firefly, self.args.commit_workers, self.args.commit_queue_size, self.args.commit_batch_size)
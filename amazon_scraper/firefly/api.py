@@ -1,18 +1,55 @@
 import json
 import logging
-from typing import Union
+from typing import Iterator, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 from amazon_scraper.firefly.models.transaction_group import TransactionGroup
 
 
 class FireflyAPI:
     """Firefly API driver."""
 
-    def __init__(self, host: str, auth_token: str):
-        self.headers = {'Authorization': "Bearer " + auth_token if auth_token is not None else ''}
+    JSON_HEADERS = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+    }
+
+    def __init__(
+        self,
+        host: str,
+        auth_token: str,
+        pool_size: int = 10,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: Union[float, None] = 30,
+    ):
         self.host = host if host is None or not host.endswith('/') else host[:-1] # Remove trailing backslash
         self.base_url = self.host + '/api/v1' if host is not None else self.host
+        self.timeout = timeout
+        self.session = FireflyAPI._make_session(auth_token, pool_size, retries, backoff_factor)
+
+    @staticmethod
+    def _make_session(auth_token: str, pool_size: int, retries: int, backoff_factor: float):
+        """Creates a keep-alive session which retries idempotent requests on 429 and 5xx responses."""
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "PUT", "DELETE"], # POST is not idempotent
+            respect_retry_after_header=True,
+            raise_on_status=False, # Let _validated report the last response
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({'Authorization': "Bearer " + auth_token if auth_token is not None else ''})
+        return session
 
     def _validated(self, response):
         """Returns valid responses or throws an error, supplying it with response body"""
@@ -21,54 +58,70 @@ class FireflyAPI:
             response.raise_for_status()
             return response
         except:
-            logging.error(f"Error response body: {response.json()}")
+            logging.error(f"Error response body: {response.text}")
             raise
 
-    def _get(self, endpoint: str, params: Union[dict, None] = None):
+    def _get(self, endpoint: str, params: Union[dict, None] = None, timeout: Union[float, None] = None):
         """Handles general GET requests."""
 
-        return self._validated(requests.get(
+        return self._validated(self.session.get(
             f"{self.base_url}{endpoint}",
             params=params,
-            headers=self.headers
+            timeout=timeout or self.timeout,
         ))
 
-    def _post(self, endpoint: str, payload: str):
+    def _post(self, endpoint: str, payload: str, timeout: Union[float, None] = None):
         """Handles general POST requests."""
 
-        return self._validated(requests.post(
+        return self._validated(self.session.post(
             f"{self.base_url}{endpoint}",
             json=payload,
-            headers={
-                **self.headers,
-                **{
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json',
-                }
-            }
+            headers=FireflyAPI.JSON_HEADERS,
+            timeout=timeout or self.timeout,
         ))
 
-    def _put(self, endpoint: str, payload: str):
+    def _put(self, endpoint: str, payload: str, timeout: Union[float, None] = None):
         """Handles general PUT requests."""
 
-        return self._validated(requests.put(
+        return self._validated(self.session.put(
             f"{self.base_url}{endpoint}",
             data=payload,
-            headers={
-                **self.headers,
-                **{
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json',
-                }
-            }
+            headers=FireflyAPI.JSON_HEADERS,
+            timeout=timeout or self.timeout,
         ))
 
-    def search_transactions(self, query: str, page: int = 1):
-        data = self._get("/search/transactions", params={
-            "query": query,
-            "page": page,
-        }).json()["data"]
-        return [TransactionGroup.from_json(json) for json in data]
+    def close(self):
+        self.session.close()
+
+    def search_transactions(self, query: str, page: int = 1, max_pages: Union[int, None] = None) -> Iterator[TransactionGroup]:
+        """Yields transaction groups matching the query, following search result pages starting from `page`."""
+
+        params = {"query": query, "page": page}
+        pages = 0
+        while True:
+            response = self._get("/search/transactions", params=params).json()
+            for json in response["data"]:
+                yield TransactionGroup.from_json(json)
+
+            pages += 1
+            if max_pages is not None and pages >= max_pages:
+                return
+
+            next_page = self._next_page(response, params["page"])
+            if next_page is None:
+                return
+            logging.debug(f"Fetching search results page {next_page}")
+            params = {**params, "page": next_page}
+
+    @staticmethod
+    def _next_page(response: dict, page: int) -> Union[int, None]:
+        """Returns the next page number using response `links.next` or `meta.pagination` data."""
+
+        pagination = response.get("meta", {}).get("pagination")
+        if pagination is not None:
+            current_page = int(pagination["current_page"])
+            return current_page + 1 if current_page < int(pagination["total_pages"]) else None
+        return page + 1 if response.get("links", {}).get("next") else None
 
     def update_transaction(self, group: TransactionGroup):
         return self._put(f"/transactions/{group.id}", json.dumps(group.to_json()))
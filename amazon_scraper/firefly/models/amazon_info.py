@@ -1,8 +1,12 @@
+from typing import Union
+
 from amazon_scraper.firefly.models.common import *
 
 
 class AmazonInfo:
-    def __init__(self, order_id: str, tx_id: str):
+    __slots__ = ("original_id", "order_id", "tx_id")
+
+    def __init__(self, order_id: str, tx_id: Union[str, None]):
         self.original_id = order_id
         self.order_id = order_id.replace(".", "-")
         self.tx_id = tx_id
@@ -1,19 +1,44 @@
+import sys
+from datetime import date
 from typing import List, Union
 
 from amazon_scraper.firefly.models.tags import Tags
+from amazon_scraper.money import Money
+
+# Fields of a Firefly transaction which are sent back in updates
+UPDATE_KEYS = (
+    "amount", "book_date", "budget_id", "category_name", "currency_id", "date", "description",
+    "destination_id", "destination_name", "due_date", "external_url", "foreign_amount",
+    "foreign_currency_id", "interest_date", "internal_reference", "invoice_date", "notes",
+    "payment_date", "process_date", "source_id", "source_name", "tags", "transaction_journal_id", "type",
+)
+KEY_INDEX = {key: index for index, key in enumerate(UPDATE_KEYS)}
+# Values shared by most transactions of an account, stored once
+INTERNED_INDEXES = [KEY_INDEX[x] for x in ["budget_id", "category_name", "currency_id", "destination_id", "destination_name", "source_id", "source_name", "type"]]
+TAGS_INDEX = KEY_INDEX["tags"]
+# Marks fields missing from the payload
+MISSING = object()
 
 
 class Transaction:
-    def __init__(self, id: int, description: str, amount: str, currency_code: str = "EUR", notes: Union[str, None] = None, tags: Union[List[str], None] = None, internal_reference: Union[str, None] = None, external_url: Union[str, None] = None, json: Union[dict, None] = None):
+    """
+    Firefly transaction split.
+
+    The payload received from Firefly is kept as a tuple of UPDATE_KEYS values rather than a dict,
+    and turned back into a dict only when the transaction is compared or sent as an update.
+    """
+
+    __slots__ = ("_id", "description", "amount", "notes", "tags", "internal_reference", "external_url", "_payload")
+
+    def __init__(self, id: int, description: str, amount: Union[Money, str], currency_code: str = "EUR", notes: Union[str, None] = None, tags: Union[List[str], None] = None, internal_reference: Union[str, None] = None, external_url: Union[str, None] = None, json: Union[dict, None] = None):
         self._id = id
         self.description = description
-        self.amount = amount
-        self.currency_code = currency_code
+        self.amount = amount if isinstance(amount, Money) else Money.parse(amount, currency_code)
         self.notes = notes
-        self.tags = tags if tags is not None else []
+        self.tags = list(tags) if tags is not None else []
         self.internal_reference = internal_reference
         self.external_url = external_url
-        self.json = json if json is not None else {}
+        self._payload = Transaction._compact(json) if json is not None else None
 
     @staticmethod
     def from_json(json: dict):
@@ -34,29 +59,57 @@ class Transaction:
         """Modify json to prepare it for update operations"""
 
         # Remove keys which are not allowed to be sent
-        json = include_keys(json, [
-            "amount", "book_date", "budget_id", "category_name", "currency_id", "date", "description",
-            "destination_id", "destination_name", "due_date", "external_url", "foreign_amount",
-            "foreign_currency_id", "interest_date", "internal_reference", "invoice_date", "notes",
-            "payment_date", "process_date", "source_id", "source_name", "tags", "transaction_journal_id", "type",
-        ])
+        json = include_keys(json, UPDATE_KEYS)
         # Transform fields which couldn't be sent as is
         foreign_currency_id = int(json["foreign_currency_id"]) if "foreign_currency_id" in json and json["foreign_currency_id"] is not None else None
         json["foreign_currency_id"] = foreign_currency_id if foreign_currency_id != 0 else None
 
         return json
 
+    @staticmethod
+    def _compact(json: dict) -> tuple:
+        assert set(json) <= KEY_INDEX.keys(), f"Unexpected keys {set(json) - KEY_INDEX.keys()}"
+        values = [json.get(key, MISSING) for key in UPDATE_KEYS]
+        for index in INTERNED_INDEXES:
+            if isinstance(values[index], str):
+                values[index] = sys.intern(values[index])
+        if isinstance(values[TAGS_INDEX], list):
+            values[TAGS_INDEX] = tuple(values[TAGS_INDEX]) # Can't be changed through the snapshot
+        return tuple(values)
+
+    @property
+    def json(self) -> dict:
+        """Payload received from Firefly, limited to UPDATE_KEYS."""
+
+        if self._payload is None:
+            return {}
+        json = dict(zip(UPDATE_KEYS, self._payload))
+        if MISSING in self._payload:
+            json = {key: value for key, value in json.items() if value is not MISSING}
+        if isinstance(json.get("tags"), tuple):
+            json["tags"] = list(json["tags"])
+        return json
+
     @property
     def id(self):
         return self._id
 
+    @property
+    def date(self) -> Union[date, None]:
+        value = self._payload[KEY_INDEX["date"]] if self._payload is not None else None
+        return date.fromisoformat(value[:10]) if isinstance(value, str) and value else None
+
+    @property
+    def currency_code(self):
+        return self.amount.currency
+
     def __eq__(self, other): 
         if not isinstance(other, Transaction):
             return False
         return self.id == other.id and self.description == other.description and self.amount == other.amount and self.currency_code == other.currency_code and self.notes == other.notes and self.tags == other.tags and self.internal_reference == other.internal_reference and self.external_url == other.external_url
 
     def __str__(self):
-        return f'jid: {self._id}, amount: {self.currency_code} {float(self.amount):.2f}, description: {self.description}, tags: {self.tags}, url: {self.external_url}, iref: {self.internal_reference}, notes: {self.notes}'
+        return f'jid: {self._id}, amount: {self.currency_code} {self.amount}, description: {self.description}, tags: {self.tags}, url: {self.external_url}, iref: {self.internal_reference}, notes: {self.notes}'
 
     def copy(self):
         return Transaction.from_json({
@@ -70,13 +123,22 @@ class Transaction:
         return exclude_keys({
             **self.json,
             "description": self.description,
-            "amount": self.amount,
+            "amount": str(self.amount),
             "notes": self.notes,
             "tags": self.tags,
             "external_url": self.external_url,
             "internal_reference": self.internal_reference,
         }, ["currency_code"])
 
+    def is_changed(self):
+        """Returns whether `to_json` differs from the snapshot received from Firefly."""
+
+        original = {**self.json}
+        if "amount" in original:
+            # Firefly returns amounts with more decimals, e.g. "12.340000000000"
+            original["amount"] = str(Money.parse(original["amount"], self.currency_code))
+        return self.to_json() != original
+
     def remove_tags(self):
         for tag in Tags.all():
             if tag in self.tags:
@@ -1,15 +1,23 @@
-from functools import cached_property
 from typing import List, Union
 
 from amazon_scraper.firefly.models.amazon_info import AmazonInfo
-from amazon_scraper.firefly.models.transaction import Transaction
+from amazon_scraper.firefly.models.transaction import MISSING, Transaction
+from amazon_scraper.money import Money
 
 
 class TransactionGroup:
+    __slots__ = ("_id", "group_title", "transactions", "_original_title", "_original_count", "_amazon_info", "_amount")
+
     def __init__(self, id: str, group_title: Union[str, None], transactions: List[Transaction]):
         self._id = id
         self.group_title = group_title
         self.transactions = transactions
+        # Snapshot for change detection
+        self._original_title = group_title
+        self._original_count = len(transactions)
+        # Computed on first use
+        self._amazon_info = MISSING
+        self._amount = None
 
     @staticmethod
     def from_json(json: dict):
@@ -27,13 +35,21 @@ class TransactionGroup:
     def id(self):
         return self._id
 
-    @cached_property
-    def amazon_info(self):
-        return AmazonInfo.parse_titles([self.group_title, *[tx.description for tx in self.transactions]])
+    @property
+    def amazon_info(self) -> Union[AmazonInfo, None]:
+        if self._amazon_info is MISSING:
+            self._amazon_info = AmazonInfo.parse_titles([self.group_title, *[tx.description for tx in self.transactions]])
+        return self._amazon_info
 
-    @cached_property
-    def amount(self):
-        return f'{sum([float(item.amount.replace(",", ".")) for item in self.transactions]):.2f}'
+    @amazon_info.setter
+    def amazon_info(self, value: Union[AmazonInfo, None]):
+        self._amazon_info = value
+
+    @property
+    def amount(self) -> Money:
+        if self._amount is None:
+            self._amount = sum([item.amount for item in self.transactions], Money.zero(self.transactions[0].currency_code))
+        return self._amount
 
     def __eq__(self, other): 
         if not isinstance(other, TransactionGroup):
@@ -43,6 +59,12 @@ class TransactionGroup:
     def __str__(self):
         return f'id: {self.id}, group_title: {self.group_title}, transactions:' + "\n- " + "\n- ".join([str(item) for item in self.transactions])
 
+    def is_changed(self):
+        """Returns whether updating the group would change anything in Firefly."""
+        return self.group_title != self._original_title \
+            or len(self.transactions) != self._original_count \
+            or any(tx.is_changed() for tx in self.transactions)
+
     def to_json(self):
         return {
             **({"group_title": self.group_title} if self.group_title is not None else {}),
@@ -0,0 +1,104 @@
+import logging
+import threading
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import List, Set, Union
+
+from amazon_scraper.firefly.api import FireflyAPI
+from amazon_scraper.firefly.models.transaction_group import TransactionGroup
+from amazon_scraper.metrics import METRICS
+
+
+class CommitError:
+    def __init__(self, group: TransactionGroup, error: str):
+        self.group = group
+        self.error = error
+
+    def __str__(self):
+        return f"Group {self.group.id} failed to update:\n{self.error}"
+
+class CommitPipeline:
+    """
+    Writes transaction groups to Firefly on a bounded pool of worker threads.
+
+    Groups are queued until `batch_size` of them are collected, then the batch is written by a single worker
+    over one keep-alive connection. Firefly has no bulk update endpoint, so a batch is still one PUT per group.
+    `submit` blocks while `queue_size` batches are already waiting or being written, so scraping
+    can't run too far ahead of Firefly. Zero concurrency writes batches inline.
+    Failed writes don't stop the pipeline and are returned by `flush`.
+    """
+
+    def __init__(self, firefly: FireflyAPI, concurrency: int = 4, queue_size: Union[int, None] = None, batch_size: int = 1):
+        self.firefly = firefly
+        self.concurrency = concurrency
+        self.batch_size = max(batch_size, 1)
+        self.errors: List[CommitError] = []
+        self._lock = threading.Lock()
+        self._batch: List[TransactionGroup] = []
+        self._futures: Set[Future] = set()
+        self._slots = threading.BoundedSemaphore(queue_size or max(concurrency * 2, 1))
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="commit") if concurrency > 0 else None
+
+    def submit(self, group: TransactionGroup):
+        with self._lock:
+            self._batch.append(group)
+            if len(self._batch) < self.batch_size:
+                return
+            batch = self._batch
+            self._batch = []
+        self._submit_batch(batch)
+
+    def _submit_batch(self, batch: List[TransactionGroup]):
+        if self._executor is None:
+            self._commit_batch(batch)
+            return
+
+        self._slots.acquire()
+        future = self._executor.submit(self._commit_batch, batch)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._futures.discard(future)
+        self._slots.release()
+
+    def _commit_batch(self, batch: List[TransactionGroup]):
+        for group in batch:
+            self._commit(group)
+
+    def _commit(self, group: TransactionGroup):
+        try:
+            with METRICS.timer("commit"):
+                self.firefly.update_transaction(group)
+            METRICS.increment("commits")
+        except Exception:
+            METRICS.increment("commit_errors")
+            logging.error(f"[{group.amazon_info.order_id}] Failed to update group {group.id}:\n{traceback.format_exc()}")
+            with self._lock:
+                self.errors.append(CommitError(group, traceback.format_exc()))
+
+    def flush(self) -> List[CommitError]:
+        """Writes the queued batch, waits for all submitted groups to be written and returns errors collected since the last flush."""
+
+        with self._lock:
+            batch = self._batch
+            self._batch = []
+        if len(batch) > 0:
+            self._submit_batch(batch)
+
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures)
+
+        with self._lock:
+            errors = self.errors
+            self.errors = []
+        return errors
+
+    def close(self) -> List[CommitError]:
+        errors = self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        return errors
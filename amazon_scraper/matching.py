@@ -0,0 +1,165 @@
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Tuple
+
+from amazon_scraper.amazon.models import AmazonOrder, AmazonShipment
+from amazon_scraper.firefly.models import TransactionGroup
+from amazon_scraper.money import Money
+
+# Charges covering more shipments are unlikely and grow the search exponentially
+MAX_SUBSET_SIZE = 4
+
+
+class Assignment:
+    """Transaction group paid for one or several shipments, optionally with the order promotion deducted."""
+
+    def __init__(self, group: TransactionGroup, shipments: List[AmazonShipment], with_promotion: bool):
+        self.group = group
+        self.shipments = shipments
+        self.with_promotion = with_promotion
+
+    @property
+    def shipment(self) -> AmazonShipment:
+        """Shipments charged together joined into one."""
+        if len(self.shipments) == 1:
+            return self.shipments[0]
+        return AmazonShipment(" + ".join([x.title for x in self.shipments]), [item for x in self.shipments for item in x.items])
+
+class Solution:
+    def __init__(self, assignments: List[Assignment], unassigned_groups: List[TransactionGroup], unassigned_shipments: List[AmazonShipment], timed_out: bool):
+        self.assignments = assignments
+        self.unassigned_groups = unassigned_groups
+        self.unassigned_shipments = unassigned_shipments
+        self.timed_out = timed_out
+
+class AssignmentSolver:
+    """
+    Assigns transaction groups of an order to its shipments by exact amounts.
+
+    A group can pay for a single shipment or for a set of shipments charged at once, and the order promotion
+    can be deducted from at most one charge. The assignment is searched globally for the most matched groups,
+    then the most covered shipments. The search stops after `time_budget` seconds with the best solution found so far.
+    """
+
+    def __init__(self, shipments: List[AmazonShipment], promotion: Money, time_budget: float = 1.0):
+        self.shipments = shipments
+        self.promotion = promotion
+        self.time_budget = time_budget
+        self.currency = shipments[0].currency if len(shipments) > 0 else None
+        self.amounts = [x.amount.minor for x in shipments]
+        # Subset sums can't be pruned by a running total with negative amounts
+        self.can_prune = all(x >= 0 for x in self.amounts)
+        self.has_promotion = bool(promotion) and promotion.currency == self.currency
+        # Charge amounts paying for a single shipment, with and without the promotion
+        self.by_amount: Dict[int, List[Tuple[int, bool]]] = {}
+        for index, amount in enumerate(self.amounts):
+            self.by_amount.setdefault(amount, []).append((index, False))
+        if self.has_promotion:
+            for index, amount in enumerate(self.amounts):
+                self.by_amount.setdefault(amount - promotion.minor, []).append((index, True))
+
+    def solve(self, groups: List[TransactionGroup]) -> Solution:
+        self._groups = groups
+        self._deadline = time.monotonic() + self.time_budget
+        self._timed_out = False
+        self._best: Tuple[Tuple[int, int], List[Tuple[int, Tuple[int, ...], bool]]] = ((-1, -1), [])
+        self._search(0, (1 << len(self.shipments)) - 1, False, [], 0)
+
+        assignments = [Assignment(groups[g], [self.shipments[i] for i in indices], with_promotion) for g, indices, with_promotion in self._best[1]]
+        assigned_groups = set(g for g, _, _ in self._best[1])
+        assigned_shipments = set(i for _, indices, _ in self._best[1] for i in indices)
+        return Solution(
+            assignments,
+            [x for g, x in enumerate(groups) if g not in assigned_groups],
+            [x for i, x in enumerate(self.shipments) if i not in assigned_shipments],
+            self._timed_out,
+        )
+
+    def _search(self, index: int, remaining: int, promotion_used: bool, chosen: list, covered: int):
+        score = (len(chosen), covered)
+        if score > self._best[0]:
+            self._best = (score, list(chosen))
+
+        if index == len(self._groups) or self._timed_out:
+            return
+        if time.monotonic() > self._deadline:
+            self._timed_out = True
+            return
+        # Neither more groups nor more shipments can be matched than what's left
+        if (len(chosen) + len(self._groups) - index, covered + bin(remaining).count("1")) <= self._best[0]:
+            return
+
+        for indices, with_promotion in self._candidates(self._groups[index], remaining, promotion_used):
+            mask = sum(1 << i for i in indices)
+            chosen.append((index, indices, with_promotion))
+            self._search(index + 1, remaining & ~mask, promotion_used or with_promotion, chosen, covered + len(indices))
+            chosen.pop()
+        # The group may also be left for manual resolution
+        self._search(index + 1, remaining, promotion_used, chosen, covered)
+
+    def _candidates(self, group: TransactionGroup, remaining: int, promotion_used: bool) -> Iterator[Tuple[Tuple[int, ...], bool]]:
+        if group.amount.currency != self.currency:
+            return
+        # Single shipments first, they are the most common case
+        for i, with_promotion in self.by_amount.get(group.amount.minor, []):
+            if remaining & (1 << i) and not (with_promotion and promotion_used):
+                yield ((i,), with_promotion)
+
+        targets = [(group.amount.minor, False)]
+        if self.has_promotion and not promotion_used:
+            targets.append((group.amount.minor + self.promotion.minor, True))
+        for target, with_promotion in targets:
+            for indices in self._subset_sums(target, remaining):
+                yield (indices, with_promotion)
+
+    def _subset_sums(self, target: int, remaining: int) -> Iterator[Tuple[int, ...]]:
+        """Yields sets of at least two remaining shipments adding up to the target."""
+
+        available = [i for i in range(len(self.shipments)) if remaining & (1 << i)]
+
+        def extend(start: int, subset: Tuple[int, ...], total: int):
+            if len(subset) >= 2 and total == target:
+                yield subset
+            if len(subset) == MAX_SUBSET_SIZE:
+                return
+            for position in range(start, len(available)):
+                i = available[position]
+                if self.can_prune and total + self.amounts[i] > target:
+                    continue
+                yield from extend(position + 1, subset + (i,), total + self.amounts[i])
+
+        yield from extend(0, (), 0)
+
+def closest_shipments(groups: List[TransactionGroup], shipments: List[AmazonShipment]) -> Dict[str, AmazonShipment]:
+    """
+    Returns the most likely shipment for each group ID by minimum total amount difference.
+
+    Pairing groups and shipments in the order of their amounts minimizes the sum of absolute differences.
+    """
+
+    by_amount = lambda x: x.amount.minor
+    return {group.id: shipment for group, shipment in zip(sorted(groups, key=by_amount), sorted(shipments, key=by_amount))}
+
+class OrderIndex:
+    """
+    Orders by the amounts of their payments, to link transactions without an order ID in the description.
+
+    A transaction is linked by an equal payment amount charged within `max_days` of the transaction date.
+    """
+
+    def __init__(self, orders: Dict[str, AmazonOrder], max_days: int = 3):
+        self.max_days = max_days
+        self.by_amount: Dict[Money, List[Tuple[date, str]]] = {}
+        for order_id, order in orders.items():
+            for day, amount in order.charges:
+                self.by_amount.setdefault(amount, []).append((day, order_id))
+
+    def candidates(self, amount: Money, day: date) -> List[str]:
+        """Returns IDs of orders with a matching payment, the closest by date go first."""
+
+        distances: Dict[str, int] = {}
+        for charged, order_id in self.by_amount.get(amount, []):
+            distance = abs((charged - day).days)
+            if distance <= self.max_days:
+                distances[order_id] = min(distance, distances.get(order_id, distance))
+        return sorted(distances, key=lambda x: (distances[x], x))
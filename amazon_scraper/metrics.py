@@ -0,0 +1,176 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+
+# Upper bounds in seconds, from cache lookups to Amazon page loads
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Returns the upper bound of the bucket holding the quantile, or the maximum for the overflow bucket."""
+
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_json(self):
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count > 0 else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 6),
+        }
+
+class Metrics:
+    """
+    Thread-safe counters and latency histograms of a run.
+
+    Metrics are identified by a name and optional labels, e.g. `increment("match_outcomes", tag="amazon_match")`.
+    Phases are timed with `timer` into histograms named `<phase>_seconds`: search, cache_lookup, page_fetch,
+    parse, match and commit.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.started_at = time.time()
+
+    def increment(self, name: str, value: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(LATENCY_BUCKETS)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, phase: str, **labels: str):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(f"{phase}_seconds", time.monotonic() - start, **labels)
+
+    def counter(self, name: str, **labels: str) -> float:
+        with self.lock:
+            return self.counters.get(name, {}).get(tuple(sorted(labels.items())), 0)
+
+    def reset(self):
+        with self.lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started_at = time.time()
+
+    def summary(self) -> dict:
+        """Returns all metrics as JSON, series with labels are keyed by their label values."""
+
+        with self.lock:
+            hits = self.counters.get("cache_hits", {}).get((), 0)
+            misses = self.counters.get("cache_misses", {}).get((), 0)
+            return {
+                "started_at": self.started_at,
+                "duration": round(time.time() - self.started_at, 3),
+                "counters": {name: _by_labels(series, lambda x: x) for name, series in sorted(self.counters.items())},
+                "histograms": {name: _by_labels(series, Histogram.to_json) for name, series in sorted(self.histograms.items())},
+                "cache_hit_ratio": round(hits / (hits + misses), 4) if hits + misses > 0 else None,
+            }
+
+    def write_summary(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                lines.append(f"# TYPE amazon_scraper_{name}_total counter")
+                for labels, value in series.items():
+                    lines.append(f"amazon_scraper_{name}_total{_format_labels(labels)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines.append(f"# TYPE amazon_scraper_{name} histogram")
+                for labels, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"amazon_scraper_{name}_bucket{_format_labels(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"amazon_scraper_{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+                    lines.append(f"amazon_scraper_{name}_sum{_format_labels(labels)} {histogram.sum}")
+                    lines.append(f"amazon_scraper_{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+def _by_labels(series: dict, to_json):
+    if list(series) == [()]:
+        return to_json(series[()])
+    return {",".join(value for _, value in labels): to_json(x) for labels, x in series.items()}
+
+def _format_labels(labels: Labels) -> str:
+    if len(labels) == 0:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+def start_metrics_server(host: str, port: int, metrics: Metrics) -> "ThreadingHTTPServer":
+    """Starts a background HTTP server exposing the metrics to Prometheus on GET /metrics."""
+
+    # Imported here, so only long-running actions pay for it
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args):
+            pass # Scraped every few seconds
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+# Shared by all threads and profiles of a run, like the logging module
+METRICS = Metrics()
@@ -0,0 +1,99 @@
+from decimal import ROUND_HALF_UP, Decimal
+from functools import total_ordering
+from typing import Union
+
+# Currencies without a minor unit, all others have cents
+ZERO_DECIMAL_CURRENCIES = {"JPY", "KRW", "CLP", "ISK", "HUF"}
+
+
+@total_ordering
+class Money:
+    """
+    Exact amount in minor units (e.g. cents) of an ISO currency.
+
+    Shared by Amazon and Firefly models, so amounts are compared as integers without going through strings or floats.
+    Amounts of different currencies are never equal and can't be added.
+    """
+
+    __slots__ = ("minor", "currency")
+
+    def __init__(self, minor: int, currency: str):
+        self.minor = minor
+        self.currency = currency
+
+    @staticmethod
+    def from_decimal(amount: Decimal, currency: str) -> "Money":
+        scaled = amount.scaleb(Money.digits_of(currency)).to_integral_value(rounding=ROUND_HALF_UP)
+        return Money(int(scaled), currency)
+
+    @staticmethod
+    def parse(text: str, currency: str) -> "Money":
+        """Parses plain decimal strings like Firefly amounts: "12.5", "12.340000000000"."""
+        return Money.from_decimal(Decimal(text.strip().replace(",", ".")), currency)
+
+    @staticmethod
+    def zero(currency: str) -> "Money":
+        return Money(0, currency)
+
+    @staticmethod
+    def from_json(json: dict) -> "Money":
+        return Money(int(json["minor"]), json["currency"])
+
+    @staticmethod
+    def digits_of(currency: str) -> int:
+        return 0 if currency in ZERO_DECIMAL_CURRENCIES else 2
+
+    def to_json(self):
+        return {"minor": self.minor, "currency": self.currency}
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.minor).scaleb(-Money.digits_of(self.currency))
+
+    def _check(self, other: "Money"):
+        assert isinstance(other, Money), f"Expected Money, got {type(other)}"
+        assert self.currency == other.currency, f"Currencies differ: {self.currency} != {other.currency}"
+
+    def __add__(self, other: "Money"):
+        self._check(other)
+        return Money(self.minor + other.minor, self.currency)
+
+    def __radd__(self, other: Union["Money", int]):
+        # Lets sum() start from 0
+        return self if other == 0 else self.__add__(other)
+
+    def __sub__(self, other: "Money"):
+        self._check(other)
+        return Money(self.minor - other.minor, self.currency)
+
+    def __mul__(self, quantity: int):
+        return Money(self.minor * quantity, self.currency)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return Money(-self.minor, self.currency)
+
+    def __abs__(self):
+        return Money(abs(self.minor), self.currency)
+
+    def __bool__(self):
+        return self.minor != 0
+
+    def __eq__(self, other):
+        if not isinstance(other, Money):
+            return False
+        return self.minor == other.minor and self.currency == other.currency
+
+    def __lt__(self, other: "Money"):
+        self._check(other)
+        return self.minor < other.minor
+
+    def __hash__(self):
+        return hash((self.minor, self.currency))
+
+    def __str__(self):
+        digits = Money.digits_of(self.currency)
+        return f"{self.to_decimal():.{digits}f}"
+
+    def __repr__(self):
+        return f"Money({self.currency} {self})"
@@ -0,0 +1,75 @@
+import configparser
+import os
+from typing import List
+
+DEFAULT_QUERY = "destination_account_starts:AMAZON"
+
+
+class Profile:
+    """
+    Amazon account processed by a run.
+
+    Every profile has its own cache directory and its own Firefly search query, e.g. matching a destination
+    account per Amazon storefront. `index` is the position of the profile in the config file.
+    """
+
+    def __init__(self, name: str, index: int, host: str, user: str, password: str, query: str, cache_dir: str):
+        self.name = name
+        self.index = index
+        self.host = host
+        self.user = user
+        self.password = password
+        self.query = query
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def from_env(env: dict, cache_dir: str) -> "Profile":
+        """Returns the single account configured by AMAZON_* variables, it uses the cache directory as is."""
+        return Profile("default", 0, env["AMAZON_HOST"], env["AMAZON_USER"], env["AMAZON_PASSWORD"], DEFAULT_QUERY, cache_dir)
+
+    def __repr__(self):
+        return f"Profile({self.name}, {self.host})"
+
+def load_profiles(path: str, cache_dir: str) -> List[Profile]:
+    """
+    Reads account profiles from an INI file, one section per profile:
+
+        [de]
+        host = https://www.amazon.de
+        user = me@example.com
+        password = ...
+        query = destination_account_is:"Amazon DE"
+
+    `cache` defaults to the section name, a subdirectory of the cache directory. `query` is required with
+    several profiles, which can't search the same transactions, and otherwise defaults to all destination
+    accounts starting with AMAZON.
+    """
+
+    config = configparser.ConfigParser(interpolation=None)
+    if len(config.read(path)) == 0:
+        raise EnvironmentError(f"Profiles file {path} can't be read")
+
+    required = ["host", "user", "password", *(["query"] if len(config.sections()) > 1 else [])]
+    profiles = []
+    for index, name in enumerate(config.sections()):
+        section = config[name]
+        missing = [x for x in required if not section.get(x)]
+        if len(missing) > 0:
+            raise EnvironmentError(f"Failed because {missing} are not set in profile {name}")
+        profiles.append(Profile(
+            name,
+            index,
+            section["host"],
+            section["user"],
+            section["password"],
+            section.get("query", DEFAULT_QUERY),
+            os.path.join(cache_dir, section.get("cache", name)),
+        ))
+
+    if len(profiles) == 0:
+        raise EnvironmentError(f"No profiles found in {path}")
+    if len(set(os.path.normpath(x.cache_dir) for x in profiles)) < len(profiles):
+        raise EnvironmentError("Profiles can't share a cache directory")
+    if len(set(x.query.strip() for x in profiles)) < len(profiles):
+        raise EnvironmentError("Profiles can't share a query")
+    return profiles
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Union
+
+
+class GroupState:
+    def __init__(self, group_id: str, order_id: str, outcome: str, attempts: int, next_retry_at: float, updated_at: float):
+        self.group_id = group_id
+        self.order_id = order_id
+        self.outcome = outcome
+        self.attempts = attempts
+        self.next_retry_at = next_retry_at
+        self.updated_at = updated_at
+
+class ProcessingState:
+    """
+    Outcomes of transaction groups which couldn't be matched yet, stored in an SQLite database inside the cache directory.
+
+    Each failed attempt doubles the delay before the group is retried, starting from `base_delay` up to `max_delay`
+    seconds. Matched groups are forgotten, they get notes and aren't returned by Firefly searches anymore.
+    Date windows of fetch runs which ended in the past are checkpointed by their search query once all their
+    orders were matched and their updates written.
+    """
+
+    FILENAME = "state.sqlite3"
+    BATCH_SIZE = 500
+
+    # Outcomes
+    SCRAPE_ERROR = "scrape_error"
+    INCOMPLETE = "incomplete"
+
+    def __init__(self, cache_dir: str, base_delay: float = 3600, max_delay: float = 7 * 24 * 3600):
+        self.cache_dir = cache_dir if cache_dir.endswith("/") else cache_dir + "/"
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.cache_dir + ProcessingState.FILENAME, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self._migrate()
+
+    def _migrate(self):
+        (version,) = self.db.execute("PRAGMA user_version").fetchone()
+
+        if version < 1:
+            with self.lock, self.db:
+                self.db.execute("BEGIN")
+                self.db.execute("""
+                    CREATE TABLE IF NOT EXISTS groups (
+                        group_id TEXT PRIMARY KEY,
+                        order_id TEXT NOT NULL,
+                        outcome TEXT NOT NULL,
+                        attempts INTEGER NOT NULL,
+                        next_retry_at REAL NOT NULL,
+                        updated_at REAL NOT NULL
+                    )
+                """)
+                self.db.execute("CREATE INDEX IF NOT EXISTS groups_order_id ON groups (order_id)")
+                self.db.execute("PRAGMA user_version = 1")
+
+        if version < 2:
+            # Checkpoints of date windows processed by fetch
+            with self.lock, self.db:
+                self.db.execute("BEGIN")
+                self.db.execute("""
+                    CREATE TABLE IF NOT EXISTS windows (
+                        query TEXT PRIMARY KEY,
+                        completed_at REAL NOT NULL
+                    )
+                """)
+                self.db.execute("PRAGMA user_version = 2")
+
+    def get(self, group_id: str) -> Union[GroupState, None]:
+        with self.lock:
+            row = self.db.execute("SELECT * FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+        return GroupState(*row) if row is not None else None
+
+    def entries(self) -> List[GroupState]:
+        with self.lock:
+            return [GroupState(*row) for row in self.db.execute("SELECT * FROM groups")]
+
+    def is_waiting(self, group_ids: Iterable[str], now: Union[float, None] = None) -> bool:
+        """Returns whether all groups failed before and none of them is due for a retry. New groups are never waiting."""
+
+        group_ids = list(group_ids)
+        now = now if now is not None else time.time()
+        with self.lock:
+            (count, next_retry_at) = self.db.execute(
+                f"SELECT count(*), min(next_retry_at) FROM groups WHERE group_id IN ({', '.join('?' * len(group_ids))})",
+                group_ids,
+            ).fetchone()
+        return len(group_ids) > 0 and count == len(group_ids) and next_retry_at > now
+
+    def record_failure(self, group_ids: Iterable[str], order_id: str, outcome: str):
+        now = time.time()
+        with self.lock, self.db:
+            self.db.execute("BEGIN")
+            for group_id in group_ids:
+                row = self.db.execute("SELECT attempts FROM groups WHERE group_id = ?", (group_id,)).fetchone()
+                attempts = (row[0] if row is not None else 0) + 1
+                self.db.execute(
+                    "INSERT OR REPLACE INTO groups (group_id, order_id, outcome, attempts, next_retry_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (group_id, order_id, outcome, attempts, now + self.delay(attempts), now),
+                )
+
+    def delay(self, attempts: int) -> float:
+        return min(self.base_delay * 2 ** (attempts - 1), self.max_delay)
+
+    def forget(self, group_ids: Iterable[str]):
+        group_ids = list(group_ids)
+        for start in range(0, len(group_ids), ProcessingState.BATCH_SIZE):
+            batch = group_ids[start:start + ProcessingState.BATCH_SIZE]
+            with self.lock:
+                self.db.execute(f"DELETE FROM groups WHERE group_id IN ({', '.join('?' * len(batch))})", batch)
+
+    def forget_except(self, group_ids: Iterable[str]):
+        """Removes groups which aren't pending anymore, e.g. resolved manually in Firefly."""
+
+        keep = set(group_ids)
+        self.forget([x.group_id for x in self.entries() if x.group_id not in keep])
+
+    def complete_window(self, query: str):
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO windows (query, completed_at) VALUES (?, ?)", (query, time.time()))
+
+    def is_window_completed(self, query: str) -> bool:
+        with self.lock:
+            return self.db.execute("SELECT 1 FROM windows WHERE query = ?", (query,)).fetchone() is not None
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,84 @@
+"""
+Model memory benchmark over generated orders and transactions.
+
+Reports bytes retained per transaction group and per cached order after loading them from JSON,
+the way they arrive from Firefly searches and the order cache. Payloads are parsed inside the
+measurement and dropped afterwards, so only what the models keep is counted.
+
+    python -m benchmarks.bench_memory --save before
+    python -m benchmarks.bench_memory --compare before
+"""
+
+import argparse
+import gc
+import json
+import platform
+import tracemalloc
+from typing import Callable, List
+
+from amazon_scraper.amazon.models import AmazonOrder
+from amazon_scraper.firefly.models import TransactionGroup
+from benchmarks.bench_suite import load_results, revision, save_results
+from benchmarks.generators import generate_groups, generate_orders
+
+
+def retained_bytes(load: Callable[[], List[object]]) -> int:
+    """Returns the memory retained by the objects returned by `load`."""
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        objects = load()
+        gc.collect()
+        (current, _) = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del objects
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=10000, help="Number of generated orders.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data.")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/results/NAME.json.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with results saved as NAME.")
+    args = parser.parse_args()
+
+    orders = generate_orders(args.orders, args.seed)
+    # Serialized like API responses and cache entries, so every loaded object gets its own strings
+    groups_payload = json.dumps(generate_groups(orders, args.seed))
+    order_payloads = [x.to_json() for x in orders.values()]
+    transactions = len(json.loads(groups_payload))
+
+    def load_groups():
+        groups = [TransactionGroup.from_json(x) for x in json.loads(groups_payload)]
+        for group in groups:
+            group.amazon_info # Parsed by every fetch run
+        return groups
+
+    cases = {
+        "TransactionGroup": (retained_bytes(load_groups), transactions),
+        "AmazonOrder": (retained_bytes(lambda: [AmazonOrder.from_json(json.loads(x)) for x in order_payloads]), len(order_payloads)),
+    }
+
+    baseline = load_results(args.compare)["cases"] if args.compare is not None else {}
+    results = {}
+    for name, (size, count) in cases.items():
+        results[name] = {"bytes": size, "items": count, "bytes_per_item": round(size / count, 1)}
+        line = f"{name:<18} {size / 1024 / 1024:8.1f} MB {results[name]['bytes_per_item']:8.0f} bytes/item"
+        if name in baseline:
+            line += f"  {baseline[name]['bytes_per_item'] / results[name]['bytes_per_item']:5.2f}x smaller than {args.compare}"
+        print(line)
+
+    if args.save is not None:
+        save_results(args.save, {
+            "revision": revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "orders": args.orders,
+            "seed": args.seed,
+            "cases": results,
+        })
+
+if __name__ == "__main__":
+    main()
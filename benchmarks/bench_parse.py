@@ -0,0 +1,57 @@
+"""
+Order page parse benchmark over saved fixtures.
+
+Compares building the full document tree with building only the div#orderDetails subtree.
+Real Amazon pages carry far more markup around the order details than the fixture,
+so `--padding` repeats the fixture navigation bar to approximate them.
+
+    python -m benchmarks.bench_parse --padding 50
+"""
+
+import argparse
+import glob
+import os
+import timeit
+
+from amazon_scraper.amazon.models import AmazonOrder
+from bs4 import BeautifulSoup
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures")
+
+
+def parse_full_document(html: str):
+    details = BeautifulSoup(html, "lxml").select_one("div#orderDetails")
+    return AmazonOrder.from_details(details, "AMAZON/order", "AMAZON")
+
+def parse_subtree(html: str):
+    return AmazonOrder.from_html(html, "AMAZON/order", "AMAZON")
+
+def pad(html: str, padding: int):
+    start = html.index('<header id="navbar">')
+    end = html.index("</header>") + len("</header>")
+    return html[:start] + html[start:end] * padding + html[end:]
+
+def load_fixtures(padding: int):
+    result = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES, "order_details*.html"))):
+        with open(path, "r") as f:
+            result[os.path.basename(path)] = pad(f.read(), padding)
+    return result
+
+def measure(function, html: str, repeat: int):
+    return min(timeit.repeat(lambda: function(html), number=1, repeat=repeat))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Number of measurements per fixture, the best one is reported.")
+    parser.add_argument("--padding", type=int, default=1, help="Number of times the page navigation bar is repeated.")
+    args = parser.parse_args()
+
+    for name, html in load_fixtures(args.padding).items():
+        assert parse_full_document(html).to_json() == parse_subtree(html).to_json(), f"{name}: parse results differ"
+        full = measure(parse_full_document, html, args.repeat)
+        subtree = measure(parse_subtree, html, args.repeat)
+        print(f"{name} ({len(html) / 1024:.0f} KB): full document {full * 1000:.2f} ms, subtree {subtree * 1000:.2f} ms, {full / subtree:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Command line startup benchmark.
+
+Runs commands in fresh interpreters and reports the best wall time over the bare interpreter startup,
+together with the heavy packages each command imported. Listing commands and cache maintenance
+shouldn't import Selenium, bs4, lxml or requests.
+
+    python -m benchmarks.bench_startup --repeat 10
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+HEAVY_PACKAGES = ["selenium", "bs4", "lxml", "requests"]
+COMMANDS = [
+    ["--help"],
+    ["cache", "--help"],
+    ["backfill", "--help"],
+    ["fetch", "--help"],
+]
+
+
+def run(args: list):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, f"{args} failed:\n{result.stderr}"
+    return (time.perf_counter() - start, result.stderr)
+
+def measure(args: list, repeat: int):
+    return min(run(args)[0] for _ in range(repeat))
+
+def imported_packages(command: list):
+    (_, log) = run(["-X", "importtime", "-m", "amazon_scraper", *command])
+    # import time: self [us] | cumulative | package
+    imported = set(re.findall(r"\|\s+([\w.]+)$", log, re.MULTILINE))
+    return [x for x in HEAVY_PACKAGES if x in imported]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10, help="Number of measurements per command, the best one is reported.")
+    args = parser.parse_args()
+
+    interpreter = measure(["-c", "pass"], args.repeat)
+    print(f"interpreter: {interpreter * 1000:.0f} ms")
+    for command in COMMANDS:
+        elapsed = measure(["-m", "amazon_scraper", *command], args.repeat) - interpreter
+        print(f"{' '.join(command)}: {elapsed * 1000:.0f} ms, imports {', '.join(imported_packages(command)) or 'nothing heavy'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmark suite over synthetic orders and transactions.
+
+Measures order processing from the cache, model (de)serialization, cache throughput and order page parsing.
+Results can be saved under benchmarks/results and compared with an earlier run, e.g. before and after a change:
+
+    python -m benchmarks.bench_suite --save before
+    python -m benchmarks.bench_suite --compare before
+
+Only results measured on the same machine are comparable.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+from amazon_scraper.__main__ import setup_parser
+from amazon_scraper.actions import fetch
+from amazon_scraper.amazon.cache import FileCache, SqliteCache
+from amazon_scraper.amazon.models import AmazonOrder
+from amazon_scraper.amazon.scraper import AmazonScraper
+from amazon_scraper.deps import AppArgs, Runner
+from amazon_scraper.firefly.models import TransactionGroup
+from benchmarks.bench_parse import load_fixtures, parse_subtree
+from benchmarks.generators import generate_groups, generate_orders
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results")
+
+# Runs a case once on the value returned by its setup, returns the number of processed items
+Case = Callable[[object], int]
+
+
+class NullFirefly:
+    """Accepts transaction updates without sending them anywhere."""
+
+    host = "FIREFLY"
+
+    def update_transaction(self, group: TransactionGroup):
+        pass
+
+def setup_cases(orders: int, seed: int, cache_dir: str) -> Dict[str, Tuple[Callable[[], object], Case]]:
+    """Returns cases by name with a setup function whose result is passed to the case, so setup isn't measured."""
+
+    generated = generate_orders(orders, seed)
+    payloads = generate_groups(generated, seed)
+    order_jsons = {order_id: x.to_json() for order_id, x in generated.items()}
+
+    amazon = AmazonScraper("https://www.amazon.de", None, None, os.path.join(cache_dir, "scraper"))
+    for order_id, value in order_jsons.items():
+        amazon.cache.add(f"{order_id}.json", value)
+    args = AppArgs(setup_parser(False).parse_args(["--commit-workers", "0", "--commit-batch-size", "50"]))
+    runner = Runner(amazon, NullFirefly(), args)
+
+    def process_orders(groups: List[TransactionGroup]):
+        by_order: Dict[str, List[TransactionGroup]] = {}
+        for group in groups:
+            by_order.setdefault(group.amazon_info.order_id, []).append(group)
+        for order_id, order_groups in by_order.items():
+            fetch.process_order(order_id, order_groups, runner)
+        runner.commits.flush()
+        return len(groups)
+
+    def file_cache_roundtrip(cache: FileCache):
+        for order_id, value in order_jsons.items():
+            cache.add(f"{order_id}.json", value)
+        for order_id in order_jsons:
+            cache.get(f"{order_id}.json")
+        return 2 * len(order_jsons)
+
+    def sqlite_cache_roundtrip(cache: SqliteCache):
+        for order_id, value in order_jsons.items():
+            cache.add(f"{order_id}.json", value)
+        cache.get_many([f"{x}.json" for x in order_jsons])
+        return 2 * len(order_jsons)
+
+    fixtures = list(load_fixtures(50).values())
+
+    def parse_fixtures(_):
+        for html in fixtures:
+            parse_subtree(html)
+        return len(fixtures)
+
+    groups_of = lambda: [TransactionGroup.from_json(x) for x in payloads]
+    return {
+        "process_order": (groups_of, process_orders),
+        "TransactionGroup.from_json": (lambda: payloads, lambda x: len([TransactionGroup.from_json(y) for y in x])),
+        "TransactionGroup.to_json": (groups_of, lambda x: len([y.to_json() for y in x])),
+        "AmazonOrder.from_json": (lambda: order_jsons, lambda x: len([AmazonOrder.from_json(json.loads(y)) for y in x.values()])),
+        "AmazonOrder.to_json": (lambda: generated, lambda x: len([y.to_json() for y in x.values()])),
+        "FileCache add+get": (lambda: FileCache(tempfile.mkdtemp(dir=cache_dir)), file_cache_roundtrip),
+        "SqliteCache add+get_many": (lambda: SqliteCache(tempfile.mkdtemp(dir=cache_dir)), sqlite_cache_roundtrip),
+        "order page parse": (lambda: None, parse_fixtures),
+    }
+
+def measure(setup: Callable[[], object], case: Case, repeat: int) -> Tuple[float, int]:
+    """Returns the best time of `repeat` runs and the number of items processed by a run."""
+
+    best = float("inf")
+    for _ in range(repeat):
+        value = setup()
+        start = time.perf_counter()
+        items = case(value)
+        best = min(best, time.perf_counter() - start)
+    return (best, items)
+
+def revision():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True, cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        return None
+
+def load_results(name: str) -> dict:
+    with open(os.path.join(RESULTS, f"{name}.json"), "r") as f:
+        return json.load(f)
+
+def save_results(name: str, results: dict):
+    os.makedirs(RESULTS, exist_ok=True)
+    with open(os.path.join(RESULTS, f"{name}.json"), "w") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=2000, help="Number of generated orders.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements per case, the best one is reported.")
+    parser.add_argument("--only", help="Run only cases containing this text.")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/results/NAME.json.")
+    parser.add_argument("--compare", metavar="NAME", help="Compare with results saved as NAME.")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.CRITICAL) # Matching logs every order
+    baseline = load_results(args.compare)["cases"] if args.compare is not None else {}
+
+    cases = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name, (setup, case) in setup_cases(args.orders, args.seed, cache_dir).items():
+            if args.only is not None and args.only not in name:
+                continue
+            (seconds, items) = measure(setup, case, args.repeat)
+            cases[name] = {"seconds": round(seconds, 6), "items": items, "us_per_item": round(seconds / items * 1e6, 3)}
+
+            line = f"{name:<28} {seconds * 1000:9.1f} ms {cases[name]['us_per_item']:10.1f} us/item"
+            if name in baseline:
+                line += f"  {baseline[name]['us_per_item'] / cases[name]['us_per_item']:5.2f}x vs {args.compare}"
+            print(line)
+
+    if args.save is not None:
+        save_results(args.save, {
+            "revision": revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "orders": args.orders,
+            "seed": args.seed,
+            "cases": cases,
+        })
+
+if __name__ == "__main__":
+    main()
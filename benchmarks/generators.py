@@ -0,0 +1,144 @@
+"""
+Synthetic Amazon orders and matching Firefly transaction groups for benchmarks.
+
+Orders have one to four shipments of one to three items, some with a promotion or a refunded item.
+Every shipment is charged separately, except some multi-shipment orders charged at once.
+Generation is deterministic for a seed, so runs of different versions process the same data.
+"""
+
+import random
+from datetime import date, timedelta
+from typing import Dict, List
+
+from amazon_scraper.amazon.models import AmazonOrder, AmazonShipment, AmazonShipmentItem
+from amazon_scraper.money import Money
+
+HOST = "https://www.amazon.de"
+PRODUCTS = ["Socks", "USB-C cable", "Coffee beans", "Notebook", "Headphones", "Desk lamp", "Phone case", "Batteries"]
+
+
+def order_id_of(rng: random.Random) -> str:
+    return f"{rng.randint(100, 999)}-{rng.randint(0, 9999999):07d}-{rng.randint(0, 9999999):07d}"
+
+def generate_orders(count: int, seed: int = 0, promo_rate: float = 0.1, refund_rate: float = 0.05) -> Dict[str, AmazonOrder]:
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    orders = {}
+    while len(orders) < count:
+        order_id = order_id_of(rng)
+        shipments = []
+        for index in range(rng.choices([1, 2, 3, 4], weights=[60, 25, 10, 5])[0]):
+            items = [
+                AmazonShipmentItem(
+                    f"{HOST}/gp/product/B0{rng.randint(0, 99999999):08d}",
+                    rng.choice(PRODUCTS),
+                    "EUR",
+                    Money(rng.randint(99, 19999), "EUR"),
+                    rng.choices([1, 2, 3], weights=[80, 15, 5])[0],
+                )
+                for _ in range(rng.choices([1, 2, 3], weights=[70, 20, 10])[0])
+            ]
+            if rng.random() < refund_rate:
+                # Refunds are joined into the shipment they belong to
+                items.append(AmazonShipmentItem(items[0].url, items[0].name, "EUR", -items[0].amount, 1))
+            shipments.append(AmazonShipment(f"Delivered {index + 1}", items))
+
+        promotion = Money(rng.randint(100, 1000), "EUR") if rng.random() < promo_rate else None
+        day = start + timedelta(days=rng.randint(0, 729))
+        charges = [x.amount - promotion if promotion is not None and index == 0 else x.amount for index, x in enumerate(shipments)]
+        summary = "\n".join([
+            f"Item(s) Subtotal: €{sum([x.amount for x in shipments], Money.zero('EUR'))}",
+            *([f"Promotion Applied: -€{promotion}"] if promotion is not None else []),
+        ])
+        transactions = "\n".join([f"{day.day} {day.strftime('%B %Y')} - Visa ending in 1234: €{x}" for x in charges])
+        orders[order_id] = AmazonOrder(f"{HOST}/gp/your-account/order-details?orderID={order_id}", summary, transactions, shipments, promotion)
+    return orders
+
+def generate_groups(orders: Dict[str, AmazonOrder], seed: int = 0, combined_rate: float = 0.1) -> List[dict]:
+    """Returns Firefly transaction group payloads charging the orders, as returned by the search API."""
+
+    rng = random.Random(seed)
+    groups = []
+    for order_id, order in orders.items():
+        (day, _) = order.charges[0]
+        amounts = [x.amount for x in order.shipments]
+        if order.promotion:
+            amounts[0] = amounts[0] - order.promotion
+        if len(amounts) > 1 and rng.random() < combined_rate:
+            amounts = [amounts[0] + amounts[1], *amounts[2:]]
+        for amount in amounts:
+            groups.append(group_json(str(len(groups) + 1), order_id, amount, day))
+    return groups
+
+def group_json(id: str, order_id: str, amount: Money, day: date) -> dict:
+    return {
+        "type": "transactions",
+        "id": id,
+        "attributes": {
+            "created_at": f"{day.isoformat()}T10:00:00+01:00",
+            "updated_at": f"{day.isoformat()}T10:00:00+01:00",
+            "user": "1",
+            "group_title": None,
+            "transactions": [{
+                "user": "1",
+                "transaction_journal_id": id,
+                "type": "withdrawal",
+                "date": f"{day.isoformat()}T00:00:00+01:00",
+                "order": 0,
+                "currency_id": "1",
+                "currency_code": "EUR",
+                "currency_symbol": "€",
+                "currency_name": "Euro",
+                "currency_decimal_places": 2,
+                "foreign_currency_id": None,
+                "foreign_currency_code": None,
+                "foreign_currency_symbol": None,
+                "foreign_currency_decimal_places": 0,
+                "amount": f"{amount.to_decimal():.12f}",
+                "foreign_amount": None,
+                "description": f"{order_id} AMZN Mktp DE {id}ABC",
+                "source_id": "1",
+                "source_name": "Checking account",
+                "source_iban": "DE89370400440532013000",
+                "source_type": "Asset account",
+                "destination_id": "2",
+                "destination_name": "AMAZON EU S.A R.L.",
+                "destination_iban": None,
+                "destination_type": "Expense account",
+                "budget_id": None,
+                "budget_name": None,
+                "category_id": None,
+                "category_name": None,
+                "bill_id": None,
+                "bill_name": None,
+                "reconciled": False,
+                "notes": None,
+                "tags": [],
+                "internal_reference": None,
+                "external_id": None,
+                "original_source": "ff3-v6.0.0",
+                "recurrence_id": None,
+                "bunq_payment_id": None,
+                "external_url": None,
+                "import_hash_v2": f"{id:0>64}",
+                "sepa_cc": None,
+                "sepa_ct_op": None,
+                "sepa_ct_id": None,
+                "sepa_db": None,
+                "sepa_country": None,
+                "sepa_ep": None,
+                "sepa_ci": None,
+                "sepa_batch_id": None,
+                "interest_date": None,
+                "book_date": None,
+                "process_date": None,
+                "due_date": None,
+                "payment_date": None,
+                "invoice_date": None,
+                "latitude": None,
+                "longitude": None,
+                "zoom_level": None,
+                "has_attachments": False,
+            }],
+        },
+    }
@@ -1,5 +1,8 @@
 import logging
+import tempfile
 import unittest
+from argparse import Namespace
+from datetime import date
 from difflib import ndiff
 from typing import List, Union
 from unittest.mock import Mock
@@ -16,6 +19,8 @@ from amazon_scraper.firefly.api import FireflyAPI
 from amazon_scraper.firefly.models.tags import Tags
 from amazon_scraper.firefly.models.transaction import Transaction
 from amazon_scraper.firefly.models.transaction_group import TransactionGroup
+from amazon_scraper.metrics import METRICS
+from amazon_scraper.state import ProcessingState
 
 ANY_VALUE="TEST_ANY_VALUE"
 
@@ -58,6 +63,14 @@ class TestActionsFetch(unittest.TestCase):
         self.amazon.host = "AMAZON"
         self.firefly.host = "FIREFLY"
         self.args.dry_run = False
+        self.args.commit_workers = 0
+        self.args.commit_queue_size = None
+        self.args.commit_batch_size = 1
+        self.args.match_time_budget = 1
+        self.args.namespace = Namespace(
+            orphan_max_days=3, retry_failed=False,
+            since=None, until=None, window_days=None, parallel_windows=1, shard=None, resume=False,
+        )
 
     def test_1by1_error(self):
         self.amazon.scrape_order.side_effect = NotFoundErr()
@@ -265,11 +278,237 @@ class TestActionsFetch(unittest.TestCase):
         ]
         self.process_and_compare(given, expected)
 
+    def test_metrics_matchOutcomes(self):
+        METRICS.reset()
+        self.amazon.scrape_order.return_value = order_with([
+            [AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "2.50", 2)],
+            [AmazonShipmentItem("AMAZON/item/30", "Shoes", "EUR", "30.00", 1)],
+            [AmazonShipmentItem("AMAZON/item/40", "Hat", "EUR", "15.00", 1)],
+        ])
+        given = [
+            TransactionGroup("1", None, [Transaction(1, "123 noise ABC", "5.00")]),
+            TransactionGroup("2", None, [Transaction(2, "123 noise ABC", "29.00")]),
+            TransactionGroup("3", None, [Transaction(3, "123 noise ABC", "16.00")]),
+        ]
+        action.process_order("123", given, Runner(self.amazon, self.firefly, self.args))
+
+        self.assertEqual(METRICS.counter("match_outcomes", tag=Tags.MATCH), 1)
+        self.assertEqual(METRICS.counter("match_outcomes", tag=Tags.MANUAL), 2)
+        self.assertEqual(METRICS.counter("match_outcomes", tag=Tags.TODO), 2)
+        self.assertEqual(METRICS.summary()["histograms"]["match_seconds"]["count"], 1)
+
+    def test_1by2_match_combinedCharge(self):
+        self.amazon.scrape_order.return_value = order_with([
+            [
+                AmazonShipmentItem("AMAZON/item/10", "Coffee", "EUR", "10.00", 1),
+            ], [
+                AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "2.50", 2),
+            ]
+        ])
+        given = [
+            TransactionGroup("1", None, [
+                Transaction(1, "123 noise ABC", "15.00"),
+            ]),
+        ]
+        expected = [
+            TransactionGroup("1", "123 noise ABC", [
+                Transaction(
+                    1, "123 noise ABC", "10.00",
+                    tags=[Tags.MATCH],
+                    notes="Coffee",
+                    internal_reference="EUR 10.00 @ AMAZON/item/10",
+                    external_url="AMAZON/order/123",
+                ),
+                Transaction(
+                    0, "123 noise ABC", "5.00",
+                    tags=[Tags.MATCH],
+                    notes="Socks",
+                    internal_reference="EUR 2.50 x2 @ AMAZON/item/20",
+                    external_url="AMAZON/order/123",
+                ),
+            ]),
+        ]
+        self.process_and_compare(given, expected)
+
+    def test_1by2_match_combinedChargeWithPromo(self):
+        self.amazon.scrape_order.return_value = order_with([
+            [
+                AmazonShipmentItem("AMAZON/item/10", "Coffee", "EUR", "10.00", 1),
+            ], [
+                AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "2.50", 2),
+            ]
+        ], promotion=1.0)
+        given = [
+            TransactionGroup("1", None, [
+                Transaction(1, "123 noise ABC", "14.00"),
+            ]),
+        ]
+        expected = [
+            TransactionGroup("1", "123 noise ABC", [
+                Transaction(
+                    1, "123 noise ABC", "14.00",
+                    tags=[Tags.MATCH, Tags.TODO],
+                    notes="Coffee",
+                    internal_reference="EUR 10.00 @ AMAZON/item/10",
+                    external_url="AMAZON/order/123",
+                ),
+                Transaction(
+                    0, "123 noise ABC", "0.01",
+                    tags=[Tags.MATCH, Tags.TODO],
+                    notes="Socks",
+                    internal_reference="EUR 2.50 x2 @ AMAZON/item/20",
+                    external_url="AMAZON/order/123",
+                ),
+            ]),
+        ]
+        self.process_and_compare(given, expected)
+
+    def test_1by2_pending(self):
+        self.amazon.scrape_order.return_value = order_with([
+            [
+                AmazonShipmentItem("AMAZON/item/10", "Coffee", "EUR", "10.00", 1),
+            ], [
+                AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "2.50", 2),
+            ]
+        ])
+        given = [
+            TransactionGroup("1", None, [
+                Transaction(1, "123 noise ABC", "7.00"), # Other shipment isn't charged yet
+            ]),
+        ]
+        expected = []
+        self.process_and_compare(given, expected)
+
+    def test_2by3_pending_exactMatches(self):
+        self.amazon.scrape_order.return_value = order_with([
+            [AmazonShipmentItem("AMAZON/item/10", "Coffee", "EUR", "10.00", 1)],
+            [AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "20.00", 1)],
+            [AmazonShipmentItem("AMAZON/item/30", "Lamp", "EUR", "30.00", 1)],
+        ])
+        given = [
+            TransactionGroup("1", None, [Transaction(1, "123 noise ABC", "10.00")]),
+            TransactionGroup("2", None, [Transaction(2, "123 noise DEF", "20.00")]), # Lamp isn't charged yet
+        ]
+        self.assertFalse(action.process_order("123", given, Runner(self.amazon, self.firefly, self.args)))
+        self.update_transaction().assert_not_called()
+
+    def test_linkOrphans(self):
+        self.amazon.cached_orders.return_value = {
+            "123": AmazonOrder("AMAZON/order/123", "", "Payments\n3 March 2023 - Visa ending in 1234: EUR 5.00", [
+                AmazonShipment("1", [AmazonShipmentItem("AMAZON/item/20", "Socks", "EUR", "2.50", 2)]),
+            ]),
+        }
+        given = [
+            TransactionGroup("1", None, [Transaction(1, "AMAZON PAYMENTS", "5.00", json={"date": "2023-03-04T00:00:00+01:00"})]),
+            TransactionGroup("2", None, [Transaction(2, "AMAZON PAYMENTS", "6.00", json={"date": "2023-03-04T00:00:00+01:00"})]),
+            TransactionGroup("3", None, [Transaction(3, "AMAZON PAYMENTS", "5.00", json={"date": "2023-04-04T00:00:00+01:00"})]),
+        ]
+        linked = action.link_orphans(given, Runner(self.amazon, self.firefly, self.args), 3)
+        self.assertEqual([x.id for x in linked], ["1"])
+        self.assertEqual(linked[0].amazon_info.order_id, "123")
+
+    def test_run_skipsWaitingOrders(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        state = ProcessingState(cache_dir.name)
+        self.addCleanup(state.close)
+        state.record_failure(["1"], "123", ProcessingState.INCOMPLETE)
+        self.amazon.scrape_orders.return_value = ({}, {})
+
+        self.firefly.search_transactions.return_value = [TransactionGroup("1", None, [Transaction(1, "123 noise ABC", "4.00")])]
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        self.amazon.scrape_orders.assert_called_once_with([])
+
+        self.firefly.search_transactions.return_value = [
+            TransactionGroup("1", None, [Transaction(1, "123 noise ABC", "4.00")]),
+            TransactionGroup("2", None, [Transaction(2, "123 noise DEF", "5.00")]),
+        ]
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        self.amazon.scrape_orders.assert_called_with(["123"])
+        self.assertEqual((state.get("1").attempts, state.get("2").attempts), (2, 1))
+        self.assertEqual(state.get("1").outcome, ProcessingState.SCRAPE_ERROR)
+
+    def test_run_dryRunKeepsCache(self):
+        self.args.dry_run = True
+        self.firefly.search_transactions.return_value = []
+        action.run(Runner(self.amazon, self.firefly, self.args))
+        self.amazon.prune_cache.assert_not_called()
+
+        self.args.dry_run = False
+        action.run(Runner(self.amazon, self.firefly, self.args))
+        self.amazon.prune_cache.assert_called_once()
+
+    def test_commit_skipsUnchanged(self):
+        group = TransactionGroup.from_json({"id": "1", "attributes": {"group_title": None, "transactions": [{
+            "transaction_journal_id": "1", "description": "123 noise ABC", "amount": "5.000000000000", "currency_code": "EUR",
+            "notes": "Socks", "tags": [Tags.MATCH], "internal_reference": "EUR 2.50 x2 @ AMAZON/item/20", "external_url": "AMAZON/order/123",
+        }]}})
+        runner = Runner(self.amazon, self.firefly, self.args)
+        action.commit_tx_group(group, runner)
+        self.update_transaction().assert_not_called()
+
+        group.transactions[0].notes = "Tie"
+        action.commit_tx_group(group, runner)
+        self.update_transaction().assert_called_once_with(group)
+
+    def test_dateWindows(self):
+        self.assertEqual(action.date_windows(None, None, 30), [(None, None)])
+        self.assertEqual(action.date_windows(date(2023, 1, 1), date(2023, 1, 25), 10), [
+            (date(2023, 1, 1), date(2023, 1, 10)),
+            (date(2023, 1, 11), date(2023, 1, 20)),
+            (date(2023, 1, 21), date(2023, 1, 25)),
+        ])
+        self.assertEqual(action.date_windows(date.today(), None, 10), [(date.today(), None)])
+
+    def test_run_windows(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        state = ProcessingState(cache_dir.name)
+        self.addCleanup(state.close)
+        self.firefly.search_transactions.return_value = []
+        self.args.namespace.since = date(2023, 1, 1)
+        self.args.namespace.until = date(2023, 1, 25)
+        self.args.namespace.window_days = 10
+        self.args.namespace.shard = (1, 2)
+        self.args.namespace.parallel_windows = 2
+
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        queries = sorted([x.args[0] for x in self.firefly.search_transactions.call_args_list])
+        self.assertEqual(queries, [
+            "destination_account_starts:AMAZON no_notes:true date_after:2023-01-01 date_before:2023-01-10",
+            "destination_account_starts:AMAZON no_notes:true date_after:2023-01-21 date_before:2023-01-25",
+        ])
+
+        self.args.namespace.shard = None
+        self.args.namespace.resume = True
+        self.firefly.search_transactions.reset_mock()
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        queries = [x.args[0] for x in self.firefly.search_transactions.call_args_list]
+        self.assertEqual(queries, ["destination_account_starts:AMAZON no_notes:true date_after:2023-01-11 date_before:2023-01-20"])
+
+    def test_run_checkpointsOnlyCompletedWindows(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        state = ProcessingState(cache_dir.name)
+        self.addCleanup(state.close)
+        self.firefly.search_transactions.return_value = []
+        self.args.namespace.since = date(2023, 1, 1)
+        self.args.namespace.window_days = 10000
+
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        self.assertFalse(state.is_window_completed("destination_account_starts:AMAZON no_notes:true date_after:2023-01-01"))
+
+        self.args.namespace.until = date(2023, 1, 10)
+        self.firefly.search_transactions.return_value = [TransactionGroup("1", None, [Transaction(1, "123 noise ABC", "4.00")])]
+        self.amazon.scrape_orders.return_value = ({}, {"123": "Not found"})
+        action.run(Runner(self.amazon, self.firefly, self.args, state))
+        self.assertFalse(state.is_window_completed("destination_account_starts:AMAZON no_notes:true date_after:2023-01-01 date_before:2023-01-10"))
+
 def order_with(items: list, promotion: Union[float, None] = None):
     if len(items) == 0 or isinstance(items[0], AmazonShipmentItem):
-        shipments = [AmazonShipment(1, items)]
+        shipments = [AmazonShipment("1", items)]
     elif isinstance(items[0], list):
-        shipments = [AmazonShipment(index, items) for index, items in enumerate(items)]
+        shipments = [AmazonShipment(str(index), items) for index, items in enumerate(items)]
     else:
         raise TypeError(f"Expected List[AmazonShipmentItem] or List[List[AmazonShipmentItem]], got {type(items)}")
 
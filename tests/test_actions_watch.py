@@ -0,0 +1,71 @@
+import logging
+import threading
+import unittest
+import urllib.request
+from unittest.mock import Mock, patch
+
+from amazon_scraper.actions import watch as action
+from amazon_scraper.amazon.scraper import AmazonScraper
+from amazon_scraper.deps import Runner
+
+
+class TestActionsWatch(unittest.TestCase):
+    # Tests
+
+    def setUp(self):
+        logging.getLogger().setLevel(logging.CRITICAL)
+        self.runner = Mock(Runner)
+        self.runner.amazon = Mock(AmazonScraper)
+        self.trigger = threading.Event()
+        self.stop = threading.Event()
+
+    def test_watch_runsOnTrigger(self):
+        runs = []
+        def fetch(runner):
+            runs.append(runner)
+            if len(runs) == 1:
+                self.trigger.set() # E.g. a webhook arrived during the run
+            else:
+                self.stop.set()
+
+        with patch("amazon_scraper.actions.fetch.run", side_effect=fetch):
+            thread = threading.Thread(target=action.watch, args=(self.runner, 3600, 600, self.trigger, self.stop))
+            thread.start()
+            thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(runs), 2)
+
+    def test_watch_survivesErrors(self):
+        runs = []
+        def fetch(runner):
+            runs.append(runner)
+            if len(runs) == 1:
+                raise ValueError("Firefly is down")
+            self.stop.set()
+
+        with patch("amazon_scraper.actions.fetch.run", side_effect=fetch):
+            action.watch(self.runner, 0, 600, self.trigger, self.stop)
+        self.assertEqual(len(runs), 2)
+
+    def test_watch_recyclesIdleDrivers(self):
+        def fetch(runner):
+            if self.runner.amazon.recycle_idle_drivers.call_count > 0:
+                self.stop.set()
+
+        with patch("amazon_scraper.actions.fetch.run", side_effect=fetch), patch("amazon_scraper.actions.watch.IDLE_CHECK_INTERVAL", 0.01):
+            action.watch(self.runner, 0.05, 600, self.trigger, self.stop)
+        self.runner.amazon.recycle_idle_drivers.assert_called_with(600)
+
+    def test_webhookListener(self):
+        server = action.start_webhook_listener("127.0.0.1", 0, self.trigger)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/", data=b'{"content": {}}', method="POST")
+        with urllib.request.urlopen(request, timeout=5) as response:
+            self.assertEqual(response.status, 204)
+        self.assertTrue(self.trigger.wait(5))
+
+if __name__ == '__main__':
+    unittest.main()
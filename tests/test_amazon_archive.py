@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from amazon_scraper.amazon.archive import HtmlArchive, reparse_page
+from amazon_scraper.amazon.scraper import AmazonScraper
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class TestAmazonArchive(unittest.TestCase):
+    # Helpers
+
+    def fixture(self, filename: str):
+        with open(os.path.join(FIXTURES, filename), "r") as f:
+            return f.read()
+
+    # Tests
+
+    def setUp(self):
+        logging.getLogger().setLevel(logging.CRITICAL)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        self.archive = HtmlArchive(os.path.join(self.cache_dir.name, "archive"))
+
+    def test_addGet(self):
+        html = self.fixture("order_details.html")
+        self.archive.add("123", html)
+        self.assertEqual(self.archive.get("123"), html)
+        self.assertIsNone(self.archive.get("456"))
+        (order_id, path) = self.archive.paths()[0]
+        self.assertEqual(order_id, "123")
+        self.assertTrue(path.endswith("123.html.gz"))
+        self.assertLess(os.path.getsize(path), len(html) / 4)
+
+    def test_reparsePage(self):
+        self.archive.add("123", self.fixture("order_details.html"))
+        self.archive.add("456", "<html></html>")
+        results = {x[0]: x for x in map(reparse_page, [(*x, "AMAZON/order", "AMAZON") for x in self.archive.paths()])}
+
+        self.assertIsNone(results["123"][2])
+        self.assertEqual(len(json.loads(results["123"][1])["shipments"]), 2)
+        self.assertIsNone(results["456"][1])
+        self.assertIn("No #orderDetails section found", results["456"][2])
+
+    def test_scraperArchivesFailedPages(self):
+        scraper = AmazonScraper("AMAZON", "user", "password", self.cache_dir.name, archive=self.archive)
+        scraper._fetch_url = Mock(return_value="<html></html>")
+        with self.assertRaises(AssertionError):
+            scraper._scrape("456")
+        self.assertEqual(self.archive.get("456"), "<html></html>")
+
+if __name__ == '__main__':
+    unittest.main()
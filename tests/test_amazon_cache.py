@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from amazon_scraper.amazon.cache import FileCache, SqliteCache
+from amazon_scraper.amazon.cache_policy import CachePolicy
+from amazon_scraper.state import ProcessingState
+
+
+class TestAmazonCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_sqlite_getAddRemove(self):
+        cache = SqliteCache(self.cache_dir.name)
+        self.assertIsNone(cache.get("1.json"))
+        cache.add("1.json", "{}")
+        cache.add("1.json", '{"a": 1}')
+        self.assertEqual(cache.get("1.json"), '{"a": 1}')
+        cache.remove("1.json")
+        self.assertIsNone(cache.get("1.json"))
+        cache.remove("1.json")
+
+    def test_sqlite_getMany(self):
+        cache = SqliteCache(self.cache_dir.name)
+        for index in range(0, 1200, 2):
+            cache.add(f"{index}.json", str(index))
+        result = cache.get_many([f"{index}.json" for index in range(1200)])
+        self.assertEqual(len(result), 600)
+        self.assertEqual(result["1198.json"], "1198")
+        self.assertNotIn("1.json", result)
+
+    def test_sqlite_persists(self):
+        cache = SqliteCache(self.cache_dir.name)
+        cache.add("1.json", "{}")
+        cache.close()
+        self.assertEqual(SqliteCache(self.cache_dir.name).get("1.json"), "{}")
+
+    def test_sqlite_importsFileCache(self):
+        files = FileCache(self.cache_dir.name)
+        files.add("1.json", "{}")
+        files.add("2.html", "<html/>")
+
+        cache = SqliteCache(self.cache_dir.name)
+        self.assertEqual(cache.get_many(["1.json", "2.html"]), {"1.json": "{}", "2.html": "<html/>"})
+        self.assertTrue(os.path.exists(os.path.join(self.cache_dir.name, "1.json")), "Files should be left in place")
+        cache.close()
+
+        # Files are imported only once
+        files.add("1.json", "changed")
+        self.assertEqual(SqliteCache(self.cache_dir.name).get("1.json"), "{}")
+
+    def test_sqlite_skipsStateDatabase(self):
+        ProcessingState(self.cache_dir.name).close()
+        FileCache(self.cache_dir.name).add("1.json", "{}")
+
+        self.assertEqual(FileCache(self.cache_dir.name).keys(), ["1.json"])
+        self.assertEqual(SqliteCache(self.cache_dir.name).keys(), ["1.json"])
+
+    def test_files_getMany(self):
+        cache = FileCache(self.cache_dir.name)
+        cache.add("1.json", "{}")
+        self.assertEqual(cache.get_many(["1.json", "2.json"]), {"1.json": "{}"})
+        self.assertEqual(cache.keys(), ["1.json"])
+
+    @patch("amazon_scraper.amazon.cache_policy.time")
+    @patch("amazon_scraper.amazon.cache.time")
+    def test_policy_ttl(self, cache_time, policy_time):
+        cache = SqliteCache(self.cache_dir.name)
+        cache_time.time.return_value = 100
+        cache.add("old.json", "{}")
+        cache.add("cookies.json", "[]")
+        cache_time.time.return_value = 200
+        cache.add("new.json", "{}")
+
+        policy_time.time.return_value = 250
+        policy = CachePolicy(ttl=100, keep=["cookies.json"])
+        self.assertEqual(policy.stats(cache).expired, 1)
+        self.assertEqual([x.key for x in policy.prune(cache)], ["old.json"])
+        self.assertEqual(sorted(cache.keys()), ["cookies.json", "new.json"])
+
+    @patch("amazon_scraper.amazon.cache.time")
+    def test_policy_lru(self, cache_time):
+        cache = SqliteCache(self.cache_dir.name)
+        for index in range(4):
+            cache_time.time.return_value = index
+            cache.add(f"{index}.json", "x" * 10)
+        cache_time.time.return_value = 10
+        cache.get("0.json") # Used recently
+
+        policy = CachePolicy(max_size=25)
+        self.assertEqual([x.key for x in policy.prune(cache)], ["1.json", "2.json"])
+        self.assertEqual(sorted(cache.keys()), ["0.json", "3.json"])
+
+    @patch("amazon_scraper.amazon.cache.time")
+    def test_policy_lru_files(self, cache_time):
+        cache = FileCache(self.cache_dir.name)
+        for index in range(4):
+            cache.add(f"{index}.json", "x" * 10)
+            os.utime(os.path.join(self.cache_dir.name, f"{index}.json"), (index, index))
+        cache_time.time.return_value = 10
+        cache.get("0.json") # Used recently, even where reads don't update access times
+
+        entry = next(x for x in cache.entries() if x.key == "0.json")
+        self.assertEqual((entry.updated_at, entry.accessed_at), (0, 10))
+        policy = CachePolicy(max_size=25)
+        self.assertEqual([x.key for x in policy.prune(cache)], ["1.json", "2.json"])
+        self.assertEqual(sorted(cache.keys()), ["0.json", "3.json"])
+
+    @patch("amazon_scraper.amazon.cache.time")
+    def test_policy_failureBudget(self, cache_time):
+        cache = SqliteCache(self.cache_dir.name)
+        for index in range(3):
+            cache_time.time.return_value = index
+            cache.add(f"{index}.html", "x" * 100)
+            cache.add(f"{index}.json", "x" * 100)
+
+        policy = CachePolicy(max_failure_size=150)
+        self.assertEqual([x.key for x in policy.prune(cache)], ["0.html", "1.html"])
+        stats = policy.stats(cache)
+        self.assertEqual((stats.failure_count, stats.failure_size), (1, 100))
+        self.assertEqual(stats.order_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import Mock
+
+from amazon_scraper.amazon.models import AmazonOrderCard
+from amazon_scraper.amazon.scraper import AmazonScraper
+from amazon_scraper.money import Money
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class TestAmazonHistory(unittest.TestCase):
+    # Helpers
+
+    def fixture(self, filename: str):
+        with open(os.path.join(FIXTURES, filename), "r") as f:
+            return f.read()
+
+    # Tests
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_parsePage(self):
+        (cards, has_next) = AmazonOrderCard.parse_page(self.fixture("order_history.html"), "AMAZON")
+        self.assertTrue(has_next)
+        self.assertEqual([x.order_id for x in cards], ["302-1111111-1111111", "302-2222222-2222222"])
+        self.assertEqual([x.date for x in cards], [date(2023, 3, 15), date(2023, 1, 2)])
+        self.assertEqual([x.total for x in cards], [Money(1500, "EUR"), Money(1299, "EUR")])
+
+        order = cards[0].order
+        self.assertEqual(order.url, "AMAZON/gp/your-account/order-details?orderID=302-1111111-1111111")
+        self.assertEqual(len(order.shipments), 1)
+        self.assertEqual(order.shipments[0].amount, Money(1500, "EUR"))
+        self.assertEqual([x.quantity for x in order.shipments[0].items], [2, 1])
+        self.assertIsNone(cards[1].order, "Order without item prices needs order details")
+
+    def test_scrapeOrderHistory(self):
+        scraper = AmazonScraper("AMAZON", "user", "password", self.cache_dir.name)
+        page = self.fixture("order_history.html")
+        last_page = page.replace('<li class="a-last">', '<li class="a-last a-disabled">')
+        previous_year = page.replace("15 March 2023", "20 December 2022").replace("2 January 2023", "2 November 2022")
+        scraper._fetch_url = Mock(side_effect=[page, last_page, previous_year])
+
+        cards = list(scraper.scrape_order_history(date(2022, 12, 1), date(2023, 2, 1)))
+        self.assertEqual([x.order_id for x in cards], ["302-2222222-2222222", "302-2222222-2222222", "302-1111111-1111111"])
+        self.assertEqual([x.args[0] for x in scraper._fetch_url.call_args_list], [
+            "AMAZON/gp/your-account/order-history?orderFilter=year-2023&startIndex=0",
+            "AMAZON/gp/your-account/order-history?orderFilter=year-2023&startIndex=2",
+            "AMAZON/gp/your-account/order-history?orderFilter=year-2022&startIndex=0",
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
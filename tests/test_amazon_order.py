@@ -0,0 +1,82 @@
+import json
+import os
+import unittest
+
+from amazon_scraper.amazon.models import AmazonOrder
+from amazon_scraper.money import Money
+from bs4 import BeautifulSoup
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+
+class TestAmazonOrder(unittest.TestCase):
+    # Helpers
+
+    def fixture(self, filename: str):
+        with open(os.path.join(FIXTURES, filename), "r") as f:
+            return f.read()
+
+    # Tests
+
+    def test_fromHtml(self):
+        order = AmazonOrder.from_html(self.fixture("order_details.html"), "AMAZON/order/123", "AMAZON")
+        self.assertEqual(order.url, "AMAZON/order/123")
+        self.assertIn("Grand Total: €31.50", order.summary.splitlines())
+        self.assertEqual(order.transactions.splitlines()[1:], [
+            "3 March 2023 - Visa ending in 1234: €20.00",
+            "5 March 2023 - Visa ending in 1234: €11.50",
+        ])
+        self.assertEqual([x.title for x in order.shipments], ["Delivered 5 March 2023", "Delivered 7 March 2023"])
+        self.assertEqual([x.amount for x in order.shipments], [Money(2000, "EUR"), Money(1250, "EUR")])
+        self.assertEqual(order.promotion, Money(100, "EUR"))
+        self.assertEqual([str(x) for x in order.shipments[0].items], [
+            "EUR 10.00 @ AMAZON/gp/product/B000000010 | Coffee",
+            "EUR 5.00 x2 @ AMAZON/gp/product/B000000011 | Tea",
+        ])
+
+    def test_fromHtml_sameAsFullDocument(self):
+        html = self.fixture("order_details.html")
+        details = BeautifulSoup(html, "lxml").select_one("div#orderDetails")
+        expected = AmazonOrder.from_details(details, "AMAZON/order/123", "AMAZON")
+        result = AmazonOrder.from_html(html, "AMAZON/order/123", "AMAZON")
+        self.assertEqual(json.loads(result.to_json()), json.loads(expected.to_json()))
+
+    def test_fromHtml_noDetails(self):
+        with self.assertRaises(AssertionError):
+            AmazonOrder.from_html("<html><body><form name='signIn'></form></body></html>", "AMAZON/order/123", "AMAZON")
+
+    def test_jsonRoundTrip(self):
+        order = AmazonOrder.from_html(self.fixture("order_details.html"), "AMAZON/order/123", "AMAZON")
+        self.assertEqual(AmazonOrder.from_json(json.loads(order.to_json())).to_json(), order.to_json())
+        self.assertNotIn("is_refund", order.to_json(), "Cached properties shouldn't be stored")
+
+    def test_toJson_skipsDerivedFields(self):
+        order = AmazonOrder.from_html(self.fixture("order_details.html"), "AMAZON/order/123", "AMAZON")
+        expected = order.to_json()
+        order.charges, order.shipments[0].amount # Cached in private slots
+
+        self.assertEqual(order.to_json(), expected)
+        self.assertFalse(hasattr(order, "__dict__"))
+
+    def test_fromJson_ignoresCachedProperties(self):
+        data = {
+            "url": "AMAZON/order/123", "summary": "", "transactions": "", "promotion": 0.0,
+            "shipments": [{"title": "Delivered", "is_refund": False, "items": [
+                {"url": "AMAZON/item/1", "name": "Socks", "currency": "€", "amount": "2.50", "quantity": 1, "price_note": "€ 2.50"},
+            ]}],
+        }
+        self.assertEqual(AmazonOrder.from_json(data).shipments[0].amount, Money(250, "EUR"))
+
+    def test_fromJson_normalisesCurrencySymbol(self):
+        data = {
+            "url": "https://www.amazon.de/order/123", "summary": "Promotion Applied: -2,00 €", "transactions": "",
+            "shipments": [{"title": "Delivered", "items": [
+                {"url": "https://www.amazon.de/item/1", "name": "Socks", "currency": "€", "amount": "2,50", "quantity": 1, "price_note": ""},
+            ]}],
+        }
+        order = AmazonOrder.from_json(data)
+        self.assertEqual(order.shipments[0].items[0].currency, "EUR")
+        self.assertEqual(order.shipments[0].items[0].amount, Money(250, "EUR"))
+        self.assertEqual(order.promotion, Money(200, "EUR"), "Older cache entries have no promotion field")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from amazon_scraper.amazon.driver import AmazonDriver
+from amazon_scraper.amazon.pool import DriverPool
+from amazon_scraper.amazon.throttle import TokenBucket
+
+
+class TestAmazonPool(unittest.TestCase):
+    def test_pool_reusesDrivers(self):
+        factory = Mock(side_effect=lambda: Mock(AmazonDriver))
+        pool = DriverPool(factory, size=2)
+        with pool.driver() as first:
+            pass
+        with pool.driver() as second:
+            self.assertIs(first, second)
+        self.assertEqual(factory.call_count, 1)
+
+    def test_pool_limitsSize(self):
+        factory = Mock(side_effect=lambda: Mock(AmazonDriver))
+        pool = DriverPool(factory, size=2)
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def borrow(_):
+            with pool.driver() as driver:
+                with lock:
+                    active.append(driver)
+                    peak.append(len(active))
+                threading.Event().wait(0.01)
+                with lock:
+                    active.remove(driver)
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(borrow, range(12)))
+
+        self.assertEqual(factory.call_count, 2)
+        self.assertLessEqual(max(peak), 2)
+
+    def test_pool_failedLoginFreesSlot(self):
+        driver = Mock(AmazonDriver)
+        factory = Mock(side_effect=[RuntimeError("Login failed"), driver])
+        pool = DriverPool(factory, size=1)
+        with self.assertRaises(RuntimeError):
+            with pool.driver():
+                pass
+        with pool.driver() as result:
+            self.assertIs(result, driver)
+
+        pool.clean_up()
+        driver.clean_up.assert_called_once()
+
+    @patch("amazon_scraper.amazon.throttle.time")
+    def test_throttle_rate(self, time):
+        time.monotonic.return_value = 100.0
+        bucket = TokenBucket(rate=0.5, burst=2)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 0)
+        self.assertEqual(bucket.acquire(), 2.0)
+        self.assertEqual(bucket.acquire(), 4.0) # Queued behind the previous caller
+        time.monotonic.return_value = 110.0
+        self.assertEqual(bucket.acquire(), 0)
+
+    def test_pool_recyclesIdleDrivers(self):
+        factory = Mock(side_effect=lambda: Mock(AmazonDriver))
+        pool = DriverPool(factory, size=2)
+        with pool.driver() as first:
+            with pool.driver() as second:
+                pass
+
+        with patch("amazon_scraper.amazon.pool.time.monotonic", return_value=pool.last_used[id(second)] + 60):
+            self.assertEqual(pool.recycle_idle(120), 0)
+            self.assertEqual(pool.recycle_idle(30), 2)
+        first.clean_up.assert_called_once()
+        self.assertEqual(pool.drivers, [])
+
+        with pool.driver() as third:
+            self.assertIsNot(third, first)
+        self.assertEqual(factory.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
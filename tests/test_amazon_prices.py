@@ -0,0 +1,52 @@
+import unittest
+from decimal import Decimal
+
+from amazon_scraper.amazon.models.prices import Storefront, currency_code
+
+
+class TestAmazonPrices(unittest.TestCase):
+    # Tests
+
+    def test_forHost(self):
+        self.assertEqual(Storefront.for_host("https://www.amazon.de").currency, "EUR")
+        self.assertEqual(Storefront.for_host("https://www.amazon.com.au/gp/your-account/order-details?orderID=1").currency, "AUD")
+        self.assertEqual(Storefront.for_host("www.amazon.com").currency, "USD")
+        self.assertEqual(Storefront.for_host("AMAZON").currency, "EUR")
+
+    def test_forHost_cachedByHostname(self):
+        Storefront._for_hostname.cache_clear()
+        for index in range(100):
+            Storefront.for_host(f"https://www.amazon.de/gp/your-account/order-details?orderID={index}")
+        self.assertEqual(Storefront._for_hostname.cache_info().currsize, 1)
+
+    def test_parsePrice(self):
+        de = Storefront.for_host("https://www.amazon.de")
+        self.assertEqual(de.parse_price("€10.00"), ("EUR", Decimal("10.00")))
+        self.assertEqual(de.parse_price("10,00 €"), ("EUR", Decimal("10.00")))
+        self.assertEqual(de.parse_price("EUR 1.234,56"), ("EUR", Decimal("1234.56")))
+        self.assertEqual(de.parse_price("1 234,56 €"), ("EUR", Decimal("1234.56")))
+        self.assertEqual(de.parse_price("Promotion Applied: -1,00 €"), ("EUR", Decimal("-1.00")))
+        self.assertEqual(de.parse_price("€ -1,00"), ("EUR", Decimal("-1.00")))
+
+    def test_parsePrice_storefrontSymbols(self):
+        self.assertEqual(Storefront.for_host("https://www.amazon.co.uk").parse_price("£3.99"), ("GBP", Decimal("3.99")))
+        self.assertEqual(Storefront.for_host("https://www.amazon.co.jp").parse_price("￥1,234"), ("JPY", Decimal("1234")))
+        self.assertEqual(Storefront.for_host("https://www.amazon.ca").parse_price("$5.00"), ("CAD", Decimal("5.00")))
+        self.assertEqual(Storefront.for_host("https://www.amazon.com").parse_price("$5.00"), ("USD", Decimal("5.00")))
+
+    def test_parseNumber_ambiguousThousands(self):
+        self.assertEqual(Storefront.for_host("https://www.amazon.de").parse_number("1.234"), Decimal("1234"))
+        self.assertEqual(Storefront.for_host("https://www.amazon.de").parse_number("1,234"), Decimal("1.234"))
+        self.assertEqual(Storefront.for_host("https://www.amazon.com").parse_number("1.234"), Decimal("1.234"))
+        self.assertEqual(Storefront.for_host("https://www.amazon.com").parse_number("1,234"), Decimal("1234"))
+
+    def test_parsePrice_noPrice(self):
+        with self.assertRaises(AssertionError):
+            Storefront.for_host("https://www.amazon.de").parse_price("Free delivery")
+
+    def test_currencyCode(self):
+        self.assertEqual(currency_code("€"), "EUR")
+        self.assertEqual(currency_code("EUR"), "EUR")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import json
+import logging
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from amazon_scraper.amazon.cache_policy import CachePolicy
+from amazon_scraper.amazon.driver import AmazonDriver
+from amazon_scraper.amazon.http import AmazonHttpClient
+from amazon_scraper.amazon.models import AmazonOrder, AmazonShipment, AmazonShipmentItem
+from amazon_scraper.amazon.scraper import SESSION_COOKIES, SESSION_USER_AGENT, AmazonScraper, AmazonScraperSetupException
+
+COOKIES = [{"name": "session-id", "value": "1"}]
+
+class TestAmazonScraper(unittest.TestCase):
+    # Helpers
+
+    def http_client(self, html):
+        http = Mock(AmazonHttpClient)
+        http.has_session = False
+        http.get_url.return_value = html
+        def set_session(cookies, user_agent):
+            http.has_session = True
+        http.set_session.side_effect = set_session
+        self.scraper.http = http
+        return http
+
+    def order(self, order_id: str):
+        return AmazonOrder(f"AMAZON/order/{order_id}", "", "", [
+            AmazonShipment("Delivered", [AmazonShipmentItem("AMAZON/item/1", "Socks", "EUR", "2.50", 1)]),
+        ])
+
+    # Tests
+
+    def setUp(self):
+        logging.getLogger().setLevel(logging.CRITICAL)
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.scraper = AmazonScraper("AMAZON/", "user", "password", self.cache_dir.name)
+
+        self.driver = Mock(AmazonDriver)
+        self.driver.get_cookies.return_value = COOKIES
+        self.driver.user_agent = "Firefox"
+        patcher = patch("amazon_scraper.amazon.driver.AmazonDriver", return_value=self.driver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_session_savedAfterLogin(self):
+        self.scraper._setup_driver("user", "password")
+        self.driver.login.assert_called_once_with("AMAZON", "user", "password")
+        self.assertEqual(json.loads(self.scraper.cache.get(SESSION_COOKIES)), COOKIES)
+
+    def test_session_restored(self):
+        self.scraper.cache.add(SESSION_COOKIES, json.dumps(COOKIES))
+        self.driver.restore_session.return_value = True
+        self.scraper._setup_driver("user", "password")
+        self.driver.restore_session.assert_called_once_with("AMAZON", COOKIES)
+        self.driver.login.assert_not_called()
+
+    def test_session_expired(self):
+        self.scraper.cache.add(SESSION_COOKIES, json.dumps([{"name": "expired"}]))
+        self.driver.restore_session.return_value = False
+        self.scraper._setup_driver("user", "password")
+        self.driver.login.assert_called_once()
+        self.assertEqual(json.loads(self.scraper.cache.get(SESSION_COOKIES)), COOKIES)
+
+    def test_http_usesSavedSession(self):
+        self.scraper.cache.add(SESSION_COOKIES, json.dumps(COOKIES))
+        self.scraper.cache.add(SESSION_USER_AGENT, "Firefox")
+        http = self.http_client("<html/>")
+
+        self.assertEqual(self.scraper._fetch_url("AMAZON/order"), "<html/>")
+        http.set_session.assert_called_once_with(COOKIES, "Firefox")
+        self.driver.get_url.assert_not_called()
+
+    def test_http_challengeFallsBackToDriver(self):
+        self.driver.get_url.return_value = "<driver/>"
+        http = self.http_client(None)
+        http.has_session = True
+
+        self.assertEqual(self.scraper._fetch_url("AMAZON/order"), "<driver/>")
+        http.set_session.assert_called_once_with(COOKIES, "Firefox")
+        self.assertIsNotNone(self.scraper.http)
+
+        self.scraper._fetch_url("AMAZON/order")
+        self.scraper._fetch_url("AMAZON/order")
+        self.assertIsNone(self.scraper.http, "HTTP backend should be disabled after repeated challenges")
+
+    def test_scrapeOrders_cacheAndScrape(self):
+        self.scraper.cache.add("1.json", self.order("1").to_json())
+        self.scraper.cache.add("2.json", "broken")
+        def scrape(order_id):
+            if order_id == "3":
+                raise ValueError("No #orderDetails section found")
+            return self.order(order_id)
+        self.scraper._scrape = Mock(side_effect=scrape)
+
+        (orders, errors) = self.scraper.scrape_orders(["1", "2", "3"])
+        self.assertEqual(sorted(orders.keys()), ["1", "2"])
+        self.assertEqual(orders["1"].url, "AMAZON/order/1")
+        self.assertEqual(list(errors.keys()), ["3"])
+        self.assertEqual(sorted(x.args[0] for x in self.scraper._scrape.call_args_list), ["2", "3"])
+
+    def test_scrapeOrders_setupFailure(self):
+        self.scraper._scrape = Mock(side_effect=AmazonScraperSetupException)
+        with self.assertRaises(AmazonScraperSetupException):
+            self.scraper.scrape_orders(["1", "2"])
+
+    def test_scrapeOrders_interrupted(self):
+        def scrape(order_id):
+            if order_id == "0":
+                raise KeyboardInterrupt()
+            time.sleep(0.05)
+            return self.order(order_id)
+        self.scraper._scrape = Mock(side_effect=scrape)
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.scraper.scrape_orders([str(x) for x in range(20)])
+        self.assertLess(self.scraper._scrape.call_count, 20, "Queued orders should be cancelled")
+
+    def test_scrape_dryRunKeepsFailurePages(self):
+        scraper = AmazonScraper("AMAZON/", "user", "password", self.cache_dir.name, cache_policy=CachePolicy(max_failure_size=0), dry_run=True)
+        scraper._fetch_url = Mock(return_value="<html></html>")
+        with self.assertRaises(Exception):
+            scraper._scrape("123")
+        self.assertEqual(scraper.cache.get("123.html"), "<html></html>")
+
+    def test_cachedOrders(self):
+        self.scraper.cache.add("123-1234567-1234567.json", self.order("123-1234567-1234567").to_json())
+        self.scraper.cache.add("123-1234567-7654321.html", "<html></html>")
+        self.scraper.cache.add(SESSION_COOKIES, json.dumps(COOKIES))
+        self.assertEqual(list(self.scraper.cached_orders()), ["123-1234567-1234567"])
+
+if __name__ == '__main__':
+    unittest.main()
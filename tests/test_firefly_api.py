@@ -0,0 +1,89 @@
+import unittest
+from unittest.mock import Mock
+
+from amazon_scraper.firefly.api import FireflyAPI
+
+
+class TestFireflyAPI(unittest.TestCase):
+    # Helpers
+
+    def page(self, ids: list, current_page: int, total_pages: int):
+        response = Mock()
+        response.json.return_value = {
+            "data": [group_json(id) for id in ids],
+            "meta": {"pagination": {"current_page": current_page, "total_pages": total_pages}},
+            "links": {"next": "next"} if current_page < total_pages else {},
+        }
+        return response
+
+    # Tests
+
+    def setUp(self):
+        self.api = FireflyAPI("FIREFLY/", "TOKEN")
+        self.api._get = Mock()
+
+    def test_search_followsPagination(self):
+        self.api._get.side_effect = [
+            self.page(["1", "2"], 1, 3),
+            self.page(["3"], 2, 3),
+            self.page(["4"], 3, 3),
+        ]
+        groups = list(self.api.search_transactions("query"))
+        self.assertEqual([x.id for x in groups], ["1", "2", "3", "4"])
+        self.assertEqual([x.kwargs["params"]["page"] for x in self.api._get.call_args_list], [1, 2, 3])
+
+    def test_search_maxPages(self):
+        self.api._get.side_effect = [
+            self.page(["1", "2"], 1, 3),
+            self.page(["3"], 2, 3),
+        ]
+        groups = list(self.api.search_transactions("query", max_pages=1))
+        self.assertEqual([x.id for x in groups], ["1", "2"])
+        self.assertEqual(self.api._get.call_count, 1)
+
+    def test_search_isLazy(self):
+        self.api._get.side_effect = [
+            self.page(["1"], 1, 2),
+            self.page(["2"], 2, 2),
+        ]
+        groups = self.api.search_transactions("query")
+        self.assertEqual(next(groups).id, "1")
+        self.assertEqual(self.api._get.call_count, 1)
+
+    def test_session_pooledWithRetries(self):
+        api = FireflyAPI("FIREFLY", "TOKEN", pool_size=4, retries=2)
+        adapter = api.session.get_adapter("https://firefly/api/v1")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(adapter.max_retries.total, 2)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+        self.assertNotIn("POST", adapter.max_retries.allowed_methods)
+        self.assertEqual(api.session.headers["Authorization"], "Bearer TOKEN")
+
+    def test_put_usesSessionAndTimeout(self):
+        api = FireflyAPI("FIREFLY", "TOKEN", timeout=5)
+        api.session = Mock()
+        api._put("/transactions/1", "{}")
+        self.assertEqual(api.session.put.call_args.kwargs["timeout"], 5)
+        api._put("/transactions/1", "{}", timeout=1)
+        self.assertEqual(api.session.put.call_args.kwargs["timeout"], 1)
+
+def group_json(id: str):
+    return {
+        "id": id,
+        "attributes": {
+            "group_title": None,
+            "transactions": [{
+                "transaction_journal_id": id,
+                "description": f"{id} noise ABC",
+                "amount": "1.00",
+                "currency_code": "EUR",
+                "notes": None,
+                "tags": [],
+                "internal_reference": None,
+                "external_url": None,
+            }],
+        },
+    }
+
+if __name__ == '__main__':
+    unittest.main()
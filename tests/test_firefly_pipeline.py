@@ -0,0 +1,73 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from amazon_scraper.firefly.api import FireflyAPI
+from amazon_scraper.firefly.models.transaction import Transaction
+from amazon_scraper.firefly.models.transaction_group import TransactionGroup
+from amazon_scraper.firefly.pipeline import CommitPipeline
+
+
+class TestFireflyPipeline(unittest.TestCase):
+    def setUp(self):
+        self.firefly = Mock(FireflyAPI)
+
+    def test_inline(self):
+        pipeline = CommitPipeline(self.firefly, concurrency=0)
+        pipeline.submit(group_with("1"))
+        self.assertEqual(self.firefly.update_transaction.call_count, 1)
+        self.assertEqual(pipeline.close(), [])
+
+    def test_concurrent_collectsErrors(self):
+        def update_transaction(group: TransactionGroup):
+            if group.id == "2":
+                raise ValueError("Boom")
+        self.firefly.update_transaction.side_effect = update_transaction
+
+        pipeline = CommitPipeline(self.firefly, concurrency=2)
+        for id in ["1", "2", "3"]:
+            pipeline.submit(group_with(id))
+        errors = pipeline.flush()
+
+        self.assertEqual(self.firefly.update_transaction.call_count, 3)
+        self.assertEqual([x.group.id for x in errors], ["2"])
+        self.assertIn("Boom", errors[0].error)
+        self.assertEqual(pipeline.close(), [])
+
+    def test_backPressure(self):
+        release = threading.Event()
+        self.firefly.update_transaction.side_effect = lambda _: release.wait(5)
+
+        pipeline = CommitPipeline(self.firefly, concurrency=1, queue_size=1)
+        pipeline.submit(group_with("1"))
+        blocked = threading.Thread(target=pipeline.submit, args=(group_with("2"),))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive(), "Submit should wait for a free queue slot")
+
+        release.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+        self.assertEqual(pipeline.close(), [])
+        self.assertEqual(self.firefly.update_transaction.call_count, 2)
+
+    def test_batches(self):
+        pipeline = CommitPipeline(self.firefly, concurrency=0, batch_size=2)
+        for id in ["1", "2", "3"]:
+            pipeline.submit(group_with(id))
+        self.assertEqual(self.firefly.update_transaction.call_count, 2, "The last batch isn't full yet")
+        self.assertEqual(pipeline.flush(), [])
+        self.assertEqual([x.args[0].id for x in self.firefly.update_transaction.call_args_list], ["1", "2", "3"])
+
+    def test_batches_concurrent(self):
+        pipeline = CommitPipeline(self.firefly, concurrency=2, batch_size=2)
+        for id in ["1", "2", "3", "4", "5"]:
+            pipeline.submit(group_with(id))
+        self.assertEqual(pipeline.close(), [])
+        self.assertEqual(sorted([x.args[0].id for x in self.firefly.update_transaction.call_args_list]), ["1", "2", "3", "4", "5"])
+
+def group_with(id: str):
+    return TransactionGroup(id, None, [Transaction(int(id), f"123 noise {id}", "1.00")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import logging
+import os
+import pkgutil
+import subprocess
+import sys
+import threading
+import unittest
+from unittest.mock import Mock
+
+from amazon_scraper import actions
+from amazon_scraper.__main__ import run_profiles, setup_parser, shared
+from amazon_scraper.actions import ACTIONS
+from amazon_scraper.deps import Runner
+from amazon_scraper.profiles import Profile
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+class TestMain(unittest.TestCase):
+    # Tests
+
+    def setUp(self):
+        logging.getLogger().setLevel(logging.CRITICAL)
+
+    def test_registry_listsEveryAction(self):
+        modules = [x.name for x in pkgutil.iter_modules(actions.__path__) if x.name != "common"]
+        self.assertEqual(sorted(ACTIONS), sorted(modules))
+
+    def test_registry_helpMatchesDocstrings(self):
+        for spec in ACTIONS.values():
+            self.assertEqual(spec.help, spec.load().__doc__, spec.name)
+
+    def test_parser_loadsChosenAction(self):
+        args = setup_parser(True).parse_args(["--dry-run", "cache", "--prune"])
+
+        self.assertEqual(args.command, "cache")
+        self.assertIs(args.func, ACTIONS["cache"].load().run)
+        self.assertTrue(args.prune)
+        self.assertTrue(args.dry_run)
+
+    def test_help_importsNoHeavyPackages(self):
+        code = (
+            "import sys, runpy\n"
+            "sys.argv = ['amazon_scraper', '--help']\n"
+            "try:\n"
+            "    runpy.run_module('amazon_scraper', run_name='__main__')\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "print(','.join(x for x in ['selenium', 'bs4', 'lxml', 'requests'] if x in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn("fetch", result.stdout)
+        self.assertEqual(result.stdout.splitlines()[-1], "")
+
+    def test_runner_createsClientsOnFirstUse(self):
+        amazon_factory = Mock()
+        firefly_factory = Mock()
+        runner = Runner(None, None, Mock(), amazon_factory=amazon_factory, firefly_factory=firefly_factory)
+        amazon_factory.assert_not_called()
+
+        self.assertIs(runner.amazon, amazon_factory.return_value)
+        self.assertIs(runner.amazon, amazon_factory.return_value)
+        amazon_factory.assert_called_once()
+        firefly_factory.assert_not_called()
+
+    def test_shared_createsOnce(self):
+        factory = Mock()
+        get = shared(factory)
+        threads = [threading.Thread(target=get) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertIs(get(), factory.return_value)
+        factory.assert_called_once()
+
+    def test_runProfiles_concurrent(self):
+        runners = [runner_of(x) for x in ["de", "uk"]]
+        barrier = threading.Barrier(2, timeout=5)
+        names = []
+        def action(runner):
+            barrier.wait() # Both profiles run at the same time
+            names.append(threading.current_thread().name)
+
+        self.assertTrue(run_profiles(action, runners))
+        self.assertEqual(sorted(names), ["de", "uk"])
+
+    def test_runProfiles_failure(self):
+        runners = [runner_of(x) for x in ["de", "uk"]]
+        done = []
+        def action(runner):
+            if runner.profile.name == "de":
+                raise ValueError("Login failed")
+            done.append(runner.profile.name)
+
+        self.assertFalse(run_profiles(action, runners))
+        self.assertEqual(done, ["uk"])
+
+def runner_of(name: str):
+    return Runner(Mock(), Mock(), Mock(), profile=Profile(name, 0, "AMAZON", "user", "password", "query", name))
+
+if __name__ == '__main__':
+    unittest.main()
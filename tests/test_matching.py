@@ -0,0 +1,93 @@
+import time
+import unittest
+from datetime import date
+
+from amazon_scraper.amazon.models import AmazonOrder, AmazonShipment, AmazonShipmentItem
+from amazon_scraper.firefly.models import Transaction, TransactionGroup
+from amazon_scraper.matching import AssignmentSolver, OrderIndex, closest_shipments
+from amazon_scraper.money import Money
+
+
+class TestMatching(unittest.TestCase):
+    # Helpers
+
+    def solve(self, groups: list, shipments: list, promotion: str = "0.00", time_budget: float = 1):
+        return AssignmentSolver(shipments, Money.parse(promotion, "EUR"), time_budget).solve(groups)
+
+    def assigned(self, solution):
+        return sorted([(x.group.id, sorted(y.title for y in x.shipments), x.with_promotion) for x in solution.assignments])
+
+    # Tests
+
+    def test_solve_singleShipments(self):
+        solution = self.solve([group("1", "5.00"), group("2", "10.00")], [shipment("A", "10.00"), shipment("B", "5.00")])
+        self.assertEqual(self.assigned(solution), [("1", ["B"], False), ("2", ["A"], False)])
+        self.assertEqual(solution.unassigned_groups, [])
+
+    def test_solve_chargeCoversSeveralShipments(self):
+        solution = self.solve([group("1", "12.00"), group("2", "3.00")], [shipment("A", "10.00"), shipment("B", "3.00"), shipment("C", "2.00")])
+        self.assertEqual(self.assigned(solution), [("1", ["A", "C"], False), ("2", ["B"], False)])
+
+    def test_solve_globalAssignment(self):
+        # The first subset found for 9.00 takes both 1.00 shipments and leaves no match for the others
+        groups = [group("1", "9.00"), group("2", "1.00"), group("3", "2.00")]
+        shipments = [shipment("A", "2.00"), shipment("B", "5.00"), shipment("C", "1.00"), shipment("D", "3.00"), shipment("E", "1.00")]
+        solution = self.solve(groups, shipments)
+        self.assertEqual(len(solution.assignments), 3)
+        self.assertEqual(solution.unassigned_shipments, [])
+
+    def test_solve_promotionUsedOnce(self):
+        solution = self.solve([group("1", "9.00"), group("2", "4.00")], [shipment("A", "10.00"), shipment("B", "5.00")], promotion="1.00")
+        self.assertEqual(len([x for x in solution.assignments if x.with_promotion]), 1)
+        self.assertEqual(len(solution.unassigned_groups), 1)
+
+    def test_solve_promotionSpreadAcrossShipments(self):
+        solution = self.solve([group("1", "14.00")], [shipment("A", "10.00"), shipment("B", "5.00")], promotion="1.00")
+        self.assertEqual(self.assigned(solution), [("1", ["A", "B"], True)])
+
+    def test_solve_otherCurrency(self):
+        solution = self.solve([group("1", "5.00", "USD")], [shipment("A", "5.00")])
+        self.assertEqual(solution.assignments, [])
+
+    def test_solve_timeBudget(self):
+        groups = [group(str(i), "1000.00") for i in range(30)]
+        shipments = [shipment(str(i), f"{i + 1}.00") for i in range(30)]
+        start = time.monotonic()
+        solution = self.solve(groups, shipments, time_budget=0.2)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertTrue(solution.timed_out)
+
+    def test_solve_largeOrder(self):
+        groups = [group(str(i), f"{i + 1}.00") for i in range(200)]
+        shipments = [shipment(str(i), f"{i + 1}.00") for i in reversed(range(200))]
+        solution = self.solve(groups, shipments)
+        self.assertFalse(solution.timed_out)
+        self.assertEqual(len(solution.assignments), 200)
+        self.assertTrue(all(x.group.amount == x.shipments[0].amount for x in solution.assignments))
+
+    def test_closestShipments(self):
+        closest = closest_shipments([group("1", "21.00"), group("2", "11.00")], [shipment("A", "10.00"), shipment("B", "20.00")])
+        self.assertEqual({key: value.title for key, value in closest.items()}, {"1": "B", "2": "A"})
+
+    def test_orderIndex_candidates(self):
+        index = OrderIndex({
+            "1": order("Payments\n3 March 2023 - Visa ending in 1234: €20.00\n5 March 2023 - Visa ending in 1234: €11.50"),
+            "2": order("Payments\n10 March 2023 - Visa ending in 1234: €20.00"),
+            "3": order(""),
+        }, max_days=4)
+        self.assertEqual(index.candidates(Money(2000, "EUR"), date(2023, 3, 4)), ["1"])
+        self.assertEqual(index.candidates(Money(2000, "EUR"), date(2023, 3, 7)), ["2", "1"])
+        self.assertEqual(index.candidates(Money(1150, "EUR"), date(2023, 3, 20)), [])
+        self.assertEqual(index.candidates(Money(2000, "USD"), date(2023, 3, 4)), [])
+
+def group(id: str, amount: str, currency: str = "EUR"):
+    return TransactionGroup(id, None, [Transaction(int(id) if id.isdigit() else 0, f"123 noise {id}", amount, currency)])
+
+def shipment(title: str, amount: str):
+    return AmazonShipment(title, [AmazonShipmentItem(f"AMAZON/item/{title}", title, "EUR", amount, 1)])
+
+def order(transactions: str):
+    return AmazonOrder("AMAZON/order/1", "", transactions, [shipment("A", "1.00")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+import tempfile
+import unittest
+import urllib.request
+
+from amazon_scraper.metrics import Metrics, start_metrics_server
+
+
+class TestMetrics(unittest.TestCase):
+    # Tests
+
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_summary(self):
+        self.metrics.increment("cache_hits", 3)
+        self.metrics.increment("cache_misses")
+        self.metrics.increment("match_outcomes", tag="amazon_match")
+        self.metrics.increment("match_outcomes", 2, tag="amazon_manual")
+        for value in [0.002, 0.003, 0.2, 7]:
+            self.metrics.observe("parse_seconds", value)
+
+        summary = self.metrics.summary()
+        self.assertEqual(summary["counters"]["cache_hits"], 3)
+        self.assertEqual(summary["counters"]["match_outcomes"], {"amazon_match": 1, "amazon_manual": 2})
+        self.assertEqual(summary["cache_hit_ratio"], 0.75)
+        histogram = summary["histograms"]["parse_seconds"]
+        self.assertEqual((histogram["count"], histogram["max"]), (4, 7))
+        self.assertEqual((histogram["p50"], histogram["p95"]), (0.005, 7))
+
+    def test_timer(self):
+        with self.assertRaises(ValueError):
+            with self.metrics.timer("commit"):
+                raise ValueError()
+        self.assertEqual(self.metrics.summary()["histograms"]["commit_seconds"]["count"], 1, "Failed phases should be timed too")
+
+    def test_writeSummary(self):
+        self.metrics.increment("commits")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.json")
+            self.metrics.write_summary(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)["counters"], {"commits": 1})
+
+    def test_prometheus(self):
+        self.metrics.increment("sleep_seconds", 2.5, reason="rate_limit")
+        self.metrics.observe("search_seconds", 0.3)
+
+        lines = self.metrics.to_prometheus().splitlines()
+        self.assertIn('amazon_scraper_sleep_seconds_total{reason="rate_limit"} 2.5', lines)
+        self.assertIn('amazon_scraper_search_seconds_bucket{le="0.25"} 0', lines)
+        self.assertIn('amazon_scraper_search_seconds_bucket{le="0.5"} 1', lines)
+        self.assertIn('amazon_scraper_search_seconds_bucket{le="+Inf"} 1', lines)
+        self.assertIn("amazon_scraper_search_seconds_count 1", lines)
+
+    def test_metricsServer(self):
+        self.metrics.increment("commits")
+        server = start_metrics_server("127.0.0.1", 0, self.metrics)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5) as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn("amazon_scraper_commits_total 1", body)
+
+if __name__ == '__main__':
+    unittest.main()
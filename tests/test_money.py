@@ -0,0 +1,62 @@
+import json
+import unittest
+from decimal import Decimal
+
+from amazon_scraper.firefly.models import Transaction, TransactionGroup
+from amazon_scraper.money import Money
+
+
+class TestMoney(unittest.TestCase):
+    # Tests
+
+    def test_parse(self):
+        self.assertEqual(Money.parse("12.340000000000", "EUR"), Money(1234, "EUR"))
+        self.assertEqual(Money.parse("0,5", "EUR"), Money(50, "EUR"))
+        self.assertEqual(Money.parse("1234", "JPY"), Money(1234, "JPY"))
+        self.assertEqual(Money.from_decimal(Decimal("2.505"), "EUR"), Money(251, "EUR"))
+
+    def test_str(self):
+        self.assertEqual(str(Money(1250, "EUR")), "12.50")
+        self.assertEqual(str(Money(-5, "EUR")), "-0.05")
+        self.assertEqual(str(Money(1234, "JPY")), "1234")
+
+    def test_arithmetic(self):
+        self.assertEqual(Money(250, "EUR") * 2 + Money(500, "EUR"), Money(1000, "EUR"))
+        self.assertEqual(Money(1000, "EUR") - Money(100, "EUR"), Money(900, "EUR"))
+        self.assertEqual(sum([Money(1, "EUR"), Money(2, "EUR")]), Money(3, "EUR"))
+        self.assertEqual(abs(-Money(5, "EUR")), Money(5, "EUR"))
+        self.assertLess(Money(1, "EUR"), Money(2, "EUR"))
+
+    def test_currencies(self):
+        self.assertNotEqual(Money(100, "EUR"), Money(100, "USD"))
+        with self.assertRaises(AssertionError):
+            Money(100, "EUR") + Money(100, "USD")
+
+    def test_jsonRoundTrip(self):
+        money = Money(1250, "EUR")
+        self.assertEqual(Money.from_json(json.loads(json.dumps(money.to_json()))), money)
+
+    def test_transactionGroupAmount(self):
+        group = TransactionGroup("1", None, [
+            Transaction(1, "123 noise ABC", "10.100000000000"),
+            Transaction(2, "123 noise ABC", "0.200000000000"),
+        ])
+        self.assertEqual(group.amount, Money(1030, "EUR"))
+        self.assertEqual([x["amount"] for x in group.to_json()["transactions"]], ["10.10", "0.20"])
+
+    def test_transactionPayload(self):
+        payload = {"transaction_journal_id": "7", "type": "withdrawal", "date": "2023-05-02T00:00:00+02:00", "amount": "2.500000000000", "currency_code": "EUR",
+            "description": "123 noise ABC", "notes": None, "tags": ["amazon"], "internal_reference": None, "external_url": None, "foreign_currency_id": None}
+        transaction = Transaction.from_json(payload)
+        transaction.tags.append("amazon_match")
+
+        self.assertEqual(transaction.json["tags"], ["amazon"], "Snapshot shouldn't change with the transaction")
+        self.assertNotIn("currency_code", transaction.json)
+        self.assertEqual(str(transaction.date), "2023-05-02")
+        self.assertTrue(transaction.is_changed())
+        transaction.tags.remove("amazon_match")
+        self.assertFalse(transaction.is_changed())
+        self.assertFalse(hasattr(transaction, "__dict__"))
+
+if __name__ == '__main__':
+    unittest.main()
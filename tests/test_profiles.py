@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from amazon_scraper.deps import Runner
+from amazon_scraper.profiles import DEFAULT_QUERY, Profile, load_profiles
+
+
+class TestProfiles(unittest.TestCase):
+    # Helpers
+
+    def write_profiles(self, text: str):
+        path = os.path.join(self.cache_dir.name, "profiles.ini")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    # Tests
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+
+    def test_loadProfiles(self):
+        path = self.write_profiles(
+            "[de]\nhost = https://www.amazon.de\nuser = a@example.com\npassword = 100%secret\n"
+            "query = destination_account_is:\"Amazon DE\"\n"
+            "\n[uk]\nhost = https://www.amazon.co.uk\nuser = b@example.com\npassword = x\n"
+            "query = destination_account_is:\"Amazon UK\"\ncache = amazon-uk\n"
+        )
+        (de, uk) = load_profiles(path, ".cache/")
+
+        self.assertEqual((de.name, de.index, de.host, de.password), ("de", 0, "https://www.amazon.de", "100%secret"))
+        self.assertEqual(de.query, "destination_account_is:\"Amazon DE\"")
+        self.assertEqual(de.cache_dir, os.path.join(".cache/", "de"))
+        self.assertEqual((uk.index, uk.query), (1, "destination_account_is:\"Amazon UK\""))
+        self.assertEqual(uk.cache_dir, os.path.join(".cache/", "amazon-uk"))
+
+    def test_loadProfiles_missingPassword(self):
+        path = self.write_profiles("[de]\nhost = https://www.amazon.de\nuser = a@example.com\n")
+        with self.assertRaisesRegex(EnvironmentError, "password"):
+            load_profiles(path, ".cache/")
+
+    def test_loadProfiles_sharedCache(self):
+        path = self.write_profiles(
+            "[de]\nhost = h\nuser = u\npassword = p\ncache = shared\n"
+            "[uk]\nhost = h\nuser = u\npassword = p\ncache = shared/\n"
+        )
+        with self.assertRaises(EnvironmentError):
+            load_profiles(path, ".cache/")
+
+    def test_loadProfiles_defaultQuery(self):
+        (de,) = load_profiles(self.write_profiles("[de]\nhost = h\nuser = u\npassword = p\n"), ".cache/")
+        self.assertEqual(de.query, DEFAULT_QUERY)
+
+        path = self.write_profiles("[de]\nhost = h\nuser = u\npassword = p\n[uk]\nhost = h\nuser = u\npassword = p\nquery = q\n")
+        with self.assertRaisesRegex(EnvironmentError, "query"):
+            load_profiles(path, ".cache/")
+
+    def test_loadProfiles_sharedQuery(self):
+        path = self.write_profiles(
+            "[de]\nhost = h\nuser = u\npassword = p\nquery = q\n"
+            "[uk]\nhost = h\nuser = u\npassword = p\nquery = q\n"
+        )
+        with self.assertRaisesRegex(EnvironmentError, "query"):
+            load_profiles(path, ".cache/")
+
+    def test_loadProfiles_missingFile(self):
+        with self.assertRaises(EnvironmentError):
+            load_profiles(os.path.join(self.cache_dir.name, "missing.ini"), ".cache/")
+
+    def test_runner_usesProfileQuery(self):
+        profile = Profile("uk", 1, "https://www.amazon.co.uk", "u", "p", "destination_account_is:UK", ".cache/uk")
+        runner = Runner(Mock(), Mock(), Mock(), profile=profile)
+        fork = runner.fork()
+
+        self.assertEqual(runner.base_query, "destination_account_is:UK")
+        self.assertEqual(fork.base_query, "destination_account_is:UK")
+        self.assertIs(fork.amazon, runner.amazon)
+        self.assertEqual(Runner(Mock(), Mock(), Mock()).base_query, DEFAULT_QUERY)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import tempfile
+import time
+import unittest
+
+from amazon_scraper.state import ProcessingState
+
+
+class TestProcessingState(unittest.TestCase):
+    # Tests
+
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.state = ProcessingState(self.cache_dir.name, base_delay=60, max_delay=300)
+        self.addCleanup(self.cache_dir.cleanup)
+        self.addCleanup(self.state.close)
+
+    def test_recordFailure_backoff(self):
+        for _ in range(4):
+            self.state.record_failure(["1"], "123", ProcessingState.INCOMPLETE)
+        entry = self.state.get("1")
+        self.assertEqual((entry.order_id, entry.outcome, entry.attempts), ("123", ProcessingState.INCOMPLETE, 4))
+        self.assertAlmostEqual(entry.next_retry_at - entry.updated_at, 300) # 60 * 2^3 capped
+        self.assertEqual([self.state.delay(x) for x in [1, 2, 3]], [60, 120, 240])
+
+    def test_isWaiting(self):
+        self.state.record_failure(["1", "2"], "123", ProcessingState.SCRAPE_ERROR)
+        self.assertTrue(self.state.is_waiting(["1", "2"]))
+        self.assertFalse(self.state.is_waiting(["1", "2", "3"]), "New groups should be processed")
+        self.assertFalse(self.state.is_waiting(["1"], now=time.time() + 61))
+        self.assertFalse(self.state.is_waiting([]))
+
+    def test_forget(self):
+        self.state.record_failure(["1", "2", "3"], "123", ProcessingState.INCOMPLETE)
+        self.state.forget(["1"])
+        self.state.forget_except(["2"])
+        self.assertEqual([x.group_id for x in self.state.entries()], ["2"])
+
+    def test_persisted(self):
+        self.state.record_failure(["1"], "123", ProcessingState.INCOMPLETE)
+        self.state.close()
+        self.state = ProcessingState(self.cache_dir.name)
+        self.assertEqual(self.state.get("1").attempts, 1)
+
+if __name__ == '__main__':
+    unittest.main()